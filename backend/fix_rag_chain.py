@@ -5,6 +5,7 @@ which is causing the BadRequestError for certain models.
 
 import os
 import dotenv
+from functools import lru_cache
 from typing import List
 
 from langchain.chains import RetrievalQA
@@ -17,8 +18,13 @@ import certifi
 # Load environment variables
 dotenv.load_dotenv()
 
+@lru_cache(maxsize=1)
 def get_mongodb_client():
-    """Get a properly configured MongoDB client."""
+    """Get a properly configured MongoDB client.
+    
+    The client is created and verified once, then shared: MongoClient is thread-safe
+    and maintains its own connection pool.
+    """
     mongodb_uri = os.getenv("MONGODB_URI")
     if not mongodb_uri:
         raise ValueError("MONGODB_URI environment variable is not set")
@@ -18,6 +18,7 @@ Environment variables:
 """
 import os
 import sys
+import asyncio
 import dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -27,9 +28,10 @@ from typing import List, Optional, Dict
 # Add the src directory to the Python path to enable imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "src")))
 
-# Import generation function
-from generation.generating_output import generate_answer
+# Import generation functions
+from generation.generating_output import generate_answer, get_rag_chain
 from utils.logger import setup_logger
+from utils.retriever_client import warm_up
 from evaluation.evaluator import evaluate_response
 
 # Load environment variables
@@ -54,6 +56,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup():
+    """
+    Build the RAG chain once at startup so requests reuse it.
+    
+    Creating the chain sets up the prompt template and the OpenAI chat client; doing
+    it here keeps that cost (and connection setup) off the per-request path. The
+    retrieval connections to MongoDB and the embedding API are warmed up likewise.
+    """
+    app.state.rag_chain = get_rag_chain()
+    logger.info("RAG chain initialized")
+    await asyncio.to_thread(warm_up)
+
 class QuestionRequest(BaseModel):
     """
     Request model for question endpoint.
@@ -132,7 +147,7 @@ async def generate(request: QuestionRequest):
             )
         
         # Generate answer using the RAG pipeline
-        answer, references = generate_answer(request.question)
+        answer, references = generate_answer(request.question, rag_chain=app.state.rag_chain)
         
         # Check if we got a valid answer or an error/fallback response
         if answer.startswith("I apologize"):
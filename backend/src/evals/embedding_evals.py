@@ -1,5 +1,8 @@
 import os
 import sys
+import asyncio
+import tempfile
+import threading
 import tqdm
 import pandas as pd
 from datasets import Dataset
@@ -13,10 +16,10 @@ sys.path.insert(0, src_dir)
 
 # Import utilities
 from utils.logger import setup_logger
-from utils.retriever_client import retrieve_similar_documents
+from utils.retriever_client import aretrieve_similar_documents
 
 # Set up logger
-logger = setup_logger(name="Evals Embeddings", log_to_file=True)
+logger = setup_logger(name="Evals Embeddings", log_to_file=True, buffered=True)
 
 # Set up logger and paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -29,32 +32,104 @@ LIMIT = 5
 EVAL_EMBEDDING_MODELS = ['openai']
 QUESTIONS = df["question"].to_list()
 GROUND_TRUTH = df["answer"].tolist()
+RETRIEVAL_CONCURRENCY = 16
+PREFETCH_CHUNK_SIZE = 64
+EVAL_BATCH_SIZE = 32
+RAGAS_WORKERS = int(os.getenv("RAGAS_WORKERS", 16))
 
 
+async def retrieve_all_contexts(questions, model, limit):
+    """
+    Retrieve the context answers for every question concurrently.
+
+    Each retrieval (embedding + $vectorSearch aggregation) runs on the event loop
+    through the async Motor client, with at most RETRIEVAL_CONCURRENCY in flight.
+
+    Args:
+        questions (list): Questions to retrieve contexts for
+        model (str): Embedding type to use ("hf" or "openai")
+        limit (int): Number of documents to retrieve per question
+
+    Returns:
+        list: One list of context answers per question, in input order
+    """
+    sem = asyncio.Semaphore(RETRIEVAL_CONCURRENCY)
+
+    async def _aretrieve(question):
+        async with sem:
+            return await aretrieve_similar_documents(question, model, limit, projection={"answer": 1})
+
+    contexts_lists = await asyncio.gather(*(_aretrieve(q) for q in questions))
+    return [[doc['answer'] for doc in ctx] for ctx in contexts_lists]
+
 
 
 
 
-all_results = []
-for model in EVAL_EMBEDDING_MODELS:
-    data = {"question": [], "ground_truth": [], "contexts": []}
-    data["question"] = QUESTIONS
-    data["ground_truth"] = GROUND_TRUTH
-    for question in QUESTIONS:
-        data["contexts"].append(
-            [doc['answer'] for doc in retrieve_similar_documents(question, model, LIMIT)])
-
-    # RAGAS expects a Dataset object
-    dataset = Dataset.from_dict(data)
-    # RAGAS runtime settings to avoid hitting OpenAI rate limits
-    run_config = RunConfig(max_workers=4, max_wait=180)
-    result = evaluate(
-        dataset=dataset,
-        metrics=[context_precision, context_recall],
-        run_config=run_config,
-        raise_exceptions=False,
-    )
-    print(f"Result for the {model} model: {result}")
 
+def _iter_rows(questions, ground_truth, model, limit):
+    """
+    Yield RAGAS rows one at a time, retrieving contexts ahead of the consumer.
 
+    Questions are retrieved in chunks of PREFETCH_CHUNK_SIZE on a background event loop:
+    while the rows of one chunk are being consumed, the next chunk is already being
+    retrieved, so only about two chunks of contexts are held in memory at once.
 
+    Args:
+        questions (list): Questions to evaluate
+        ground_truth (list): Reference answer for each question
+        model (str): Embedding type to use ("hf" or "openai")
+        limit (int): Number of documents to retrieve per question
+
+    Yields:
+        dict: Row with "question", "ground_truth" and "contexts" keys
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def submit(start):
+        chunk = questions[start:start + PREFETCH_CHUNK_SIZE]
+        return asyncio.run_coroutine_threadsafe(retrieve_all_contexts(chunk, model, limit), loop)
+
+    try:
+        pending = submit(0)
+        for start in range(0, len(questions), PREFETCH_CHUNK_SIZE):
+            contexts = pending.result()
+            # Start retrieving the next chunk before handing out this one
+            if start + PREFETCH_CHUNK_SIZE < len(questions):
+                pending = submit(start + PREFETCH_CHUNK_SIZE)
+            for offset, ctx in enumerate(contexts):
+                yield {
+                    "question": questions[start + offset],
+                    "ground_truth": ground_truth[start + offset],
+                    "contexts": ctx,
+                }
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+all_results = []
+for model in EVAL_EMBEDDING_MODELS:
+    # RAGAS expects a Dataset object. Rows are streamed into it rather than built up
+    # in Python lists first; a fresh cache dir keeps datasets from reusing contexts
+    # retrieved by a previous run
+    with tempfile.TemporaryDirectory() as cache_dir:
+        dataset = Dataset.from_generator(
+            _iter_rows,
+            gen_kwargs={"questions": QUESTIONS, "ground_truth": GROUND_TRUTH, "model": model, "limit": LIMIT},
+            cache_dir=cache_dir,
+        )
+        # RAGAS runtime settings: RAGAS_WORKERS concurrent metric calls, retried with
+        # backoff (up to max_wait seconds) when OpenAI rate limits are hit
+        run_config = RunConfig(max_workers=RAGAS_WORKERS, max_wait=180, timeout=120)
+        result = evaluate(
+            dataset=dataset,
+            metrics=[context_precision, context_recall],
+            run_config=run_config,
+            raise_exceptions=False,
+            batch_size=EVAL_BATCH_SIZE,
+        )
+    print(f"Result for the {model} model: {result}")
\ No newline at end of file
@@ -1,11 +1,15 @@
 import os
 import sys
+import csv
 import time
-import tqdm
+import asyncio
+from tqdm.asyncio import tqdm_asyncio
 import pandas as pd
+import pyarrow as pa
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+from typing import Callable
 from datasets import Dataset
 from ragas import RunConfig, evaluate
 from ragas.metrics import (
@@ -16,7 +20,6 @@ from ragas.metrics import (
 )
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.runnables.base import RunnableSequence
 from langchain_openai import ChatOpenAI
 
@@ -26,14 +29,14 @@ sys.path.insert(0, src_dir)
 
 # Import local utilities
 from utils.logger import setup_logger
-from utils.retriever_client import retrieve_similar_documents
+from utils.retriever_client import retrieve_similar_documents_batch
 
 # Load environment variables
 import dotenv
 dotenv.load_dotenv()
 
 # Set up logger and paths
-logger = setup_logger(name="RAG Evaluation", log_to_file=True)
+logger = setup_logger(name="RAG Evaluation", log_to_file=True, buffered=True)
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "../.."))
 csv_path = os.path.join(project_root, "data/test/voy_faqs.csv")
@@ -45,11 +48,29 @@ os.makedirs(results_dir, exist_ok=True)
 # Constants
 LIMIT = 5
 EVAL_EMBEDDING_MODELS = ['openai']
+MAX_CONCURRENCY = 16
+RAGAS_WORKERS = int(os.getenv("RAGAS_WORKERS", 16))
+SAVE_PARQUET = os.getenv("EVAL_RESULTS_PARQUET", "false").lower() == "true"
+
+# Columns of the detailed (per-question) and summary (per-model) results files
+DETAILED_RESULT_FIELDS = [
+    'model', 'embedding_type', 'question', 'ground_truth', 'retrieved_contexts',
+    'generated_answer', 'success', 'error'
+]
+SUMMARY_RESULT_FIELDS = [
+    'model', 'embedding_type', 'faithfulness_score', 'answer_relevancy_score',
+    'success_rate', 'error_rate', 'time_taken'
+]
 
 # Load test data
 try:
     logger.info(f"Loading test data from {csv_path}")
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(
+        csv_path,
+        usecols=["question", "answer"],
+        dtype={"question": "string", "answer": "string"},
+        engine="pyarrow"
+    )
     QUESTIONS = df["question"].to_list()
     GROUND_TRUTH = df["answer"].tolist()
     logger.info(f"Loaded {len(QUESTIONS)} questions for evaluation")
@@ -57,33 +78,29 @@ except Exception as e:
     logger.error(f"Error loading test data: {str(e)}")
     raise
 
-def get_rag_chain(model: str, embedding_type: str) -> RunnableSequence:
+# Defining the chat prompt, parsed once and shared by every chain
+_TEMPLATE = """Answer the question based only on the following context if there is no relevant content retrieved then answer that you don't know:
+        {context}
+
+        Question: {question}
+        """
+_PROMPT = ChatPromptTemplate.from_template(_TEMPLATE)
+
+def get_rag_chain(model: str) -> RunnableSequence:
     """
     Create a basic RAG chain
 
+    Retrieval happens outside the chain, so the contexts fetched for evaluation are
+    the same ones the answer is generated from, and each question is retrieved once.
+    The chain is invoked with {"context": str, "question": str}.
+
     Args:
         model (str): Chat completion model to use
-        embedding_type (str): Type of embedding to use ("hf" or "openai")
 
     Returns:
         RunnableSequence: A RAG chain
     """
     try:
-        # Generate context using the retriever, and pass the user question through
-        retrieve = {
-            "context": lambda x: "\n\n".join([doc['answer'] for doc in retrieve_similar_documents(x, embedding_type, LIMIT)]),
-            "question": RunnablePassthrough(),
-        }
-
-        template = """Answer the question based only on the following context if there is no relevant content retrieved then answer that you don't know:
-        {context}
-
-        Question: {question}
-        """
-        
-        # Defining the chat prompt
-        prompt = ChatPromptTemplate.from_template(template)
-        
         # Defining the model to be used for chat completion
         llm = ChatOpenAI(temperature=0, model=model)
         
@@ -92,8 +109,7 @@ def get_rag_chain(model: str, embedding_type: str) -> RunnableSequence:
 
         # Naive RAG chain
         rag_chain = (
-            retrieve 
-            | prompt 
+            _PROMPT 
             | llm 
             | parse_output
         )
@@ -103,131 +119,211 @@ def get_rag_chain(model: str, embedding_type: str) -> RunnableSequence:
         logger.error(f"Error creating RAG chain for model {model}: {str(e)}")
         raise
 
-def evaluate_models():
+async def process_questions(rag_chain: RunnableSequence, all_contexts: list, desc: str, on_result: Callable = None) -> list:
     """
-    Evaluate different models using RAGAS metrics
+    Generate an answer for every question concurrently
+
+    Each question's LLM call runs as one task, with at most MAX_CONCURRENCY
+    questions in flight.
+
+    Args:
+        rag_chain (RunnableSequence): Chain from get_rag_chain
+        all_contexts (list): Retrieved documents for each question, in QUESTIONS order
+        desc (str): Progress bar description
+        on_result (Callable, optional): Called as on_result(i, context_texts, answer)
+                                        as soon as question i finishes, e.g. to save it
+
+    Returns:
+        list: One (context_texts, answer) tuple per question, in input order. For a
+              failed question, context_texts is None and answer is the exception
     """
-    all_results = {}
-    
-    # Create a list to store detailed results for each question
-    detailed_results = []
-    
-    for model in ["gpt-4o"]:
-        for embedding_type in EVAL_EMBEDDING_MODELS:
-            start_time = time.time()
-            logger.info(f"Starting evaluation for model: {model} with {embedding_type} embeddings")
-            
-            try:
-                data = {
-                    "question": QUESTIONS,
-                    "ground_truth": GROUND_TRUTH,
-                    "contexts": [],
-                    "answer": []
-                }
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
 
-                rag_chain = get_rag_chain(model, embedding_type)
+    async def _process(i, question, contexts):
+        async with sem:
+            try:
+                context_texts = [doc['answer'] for doc in contexts]
+                context = "\n\n".join(context_texts)
 
-                success_count = 0
-                error_count = 0
-                
-                for i, question in enumerate(tqdm.tqdm(QUESTIONS, desc=f"Processing questions for {model} with {embedding_type}")):
-                    try:
-                        # Get contexts first
-                        contexts = retrieve_similar_documents(question, embedding_type, LIMIT)
-                        context_texts = [doc['answer'] for doc in contexts]
-                        data["contexts"].append(context_texts)
-                        
-                        # Generate answer
-                        answer = rag_chain.invoke(question)
-                        data["answer"].append(answer)
-                        
-                        # Store detailed results
-                        detailed_results.append({
-                            'model': model,
-                            'embedding_type': embedding_type,
-                            'question': question,
-                            'ground_truth': GROUND_TRUTH[i],
-                            'retrieved_contexts': '\n'.join(context_texts),
-                            'generated_answer': answer,
-                            'success': True
-                        })
-                        
-                        success_count += 1
-                    except Exception as e:
-                        logger.error(f"Error processing question '{question}': {str(e)}")
-                        error_count += 1
-                        # Add empty results for failed questions
-                        data["answer"].append("")
-                        data["contexts"].append([])
-                        
-                        # Store failed attempt details
-                        detailed_results.append({
-                            'model': model,
-                            'embedding_type': embedding_type,
-                            'question': question,
-                            'ground_truth': GROUND_TRUTH[i],
-                            'retrieved_contexts': '',
-                            'generated_answer': '',
-                            'success': False,
-                            'error': str(e)
-                        })
-
-                # RAGAS evaluation
-                dataset = Dataset.from_dict(data)
-                run_config = RunConfig(max_workers=4, max_wait=180)
-                
-                result = evaluate(
-                    dataset=dataset,
-                    metrics=[faithfulness, answer_relevancy],
-                    run_config=run_config,
-                    raise_exceptions=False,
-                )
-                
-                elapsed_time = time.time() - start_time
-                
-                # Calculate mean scores if metrics are lists
-                faithfulness_score = float(result['faithfulness']) if isinstance(result['faithfulness'], (int, float)) else float(sum(result['faithfulness']) / len(result['faithfulness']))
-                answer_relevancy_score = float(result['answer_relevancy']) if isinstance(result['answer_relevancy'], (int, float)) else float(sum(result['answer_relevancy']) / len(result['answer_relevancy']))
-                
-                # Update metrics in detailed results
-                for item in detailed_results:
-                    if item['model'] == model and item['embedding_type'] == embedding_type:
-                        item.update({
-                            'faithfulness_score': faithfulness_score,
-                            'answer_relevancy_score': answer_relevancy_score,
-                            'time_taken': elapsed_time
-                        })
-                
-                # Log results
-                logger.info(f"Results for {model} with {embedding_type} embeddings:")
-                logger.info(f"- Success rate: {success_count}/{len(QUESTIONS)} ({success_count/len(QUESTIONS)*100:.2f}%)")
-                logger.info(f"- Error rate: {error_count}/{len(QUESTIONS)} ({error_count/len(QUESTIONS)*100:.2f}%)")
-                logger.info(f"- Time taken: {elapsed_time:.2f} seconds")
-                logger.info(f"- Metrics: Faithfulness={faithfulness_score:.3f}, Answer Relevancy={answer_relevancy_score:.3f}")
-                
-                all_results[f"{model}_{embedding_type}"] = {
-                    "metrics": {
-                        "faithfulness": faithfulness_score,
-                        "answer_relevancy": answer_relevancy_score
-                    },
-                    "success_rate": success_count/len(QUESTIONS),
-                    "error_rate": error_count/len(QUESTIONS),
-                    "time_taken": elapsed_time
-                }
-                
+                # Generate answer from the retrieved contexts
+                answer = await rag_chain.ainvoke({"context": context, "question": question})
+                outcome = context_texts, answer
             except Exception as e:
-                logger.error(f"Error evaluating model {model} with {embedding_type}: {str(e)}")
-                continue
+                outcome = None, e
+        if on_result is not None:
+            on_result(i, *outcome)
+        return outcome
+
+    return await tqdm_asyncio.gather(
+        *(_process(i, question, contexts) for i, (question, contexts) in enumerate(zip(QUESTIONS, all_contexts))),
+        desc=desc
+    )
+
+def evaluate_models():
+    """
+    Evaluate different models using RAGAS metrics
+
+    Each question's detailed result is appended to a CSV file and flushed as soon as
+    its answer is generated, so a crash or kill mid-run keeps every finished question.
+    Each model's RAGAS scores are appended to a separate summary CSV file once that
+    model's evaluation completes.
+    """
+    all_results = {}
     
-    # Save detailed results to CSV
-    results_df = pd.DataFrame(detailed_results)
+    # Open the results files once and append rows as they complete
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_path = os.path.join(results_dir, f'detailed_results_{timestamp}.csv')
-    results_df.to_csv(csv_path, index=False)
+    summary_path = os.path.join(results_dir, f'summary_results_{timestamp}.csv')
+    with open(csv_path, "w", newline="", encoding="utf-8") as results_file, \
+         open(summary_path, "w", newline="", encoding="utf-8") as summary_file:
+        writer = csv.DictWriter(results_file, fieldnames=DETAILED_RESULT_FIELDS, restval="")
+        writer.writeheader()
+        summary_writer = csv.DictWriter(summary_file, fieldnames=SUMMARY_RESULT_FIELDS)
+        summary_writer.writeheader()
+        
+        def write_row(row):
+            writer.writerow(row)
+            results_file.flush()
+        
+        for model in ["gpt-4o"]:
+            for embedding_type in EVAL_EMBEDDING_MODELS:
+                _evaluate_model(model, embedding_type, all_results, write_row)
+                
+                summary = all_results.get(f"{model}_{embedding_type}")
+                if summary is not None:
+                    summary_writer.writerow({
+                        'model': model,
+                        'embedding_type': embedding_type,
+                        'faithfulness_score': summary["metrics"]["faithfulness"],
+                        'answer_relevancy_score': summary["metrics"]["answer_relevancy"],
+                        'success_rate': summary["success_rate"],
+                        'error_rate': summary["error_rate"],
+                        'time_taken': summary["time_taken"]
+                    })
+                    summary_file.flush()
     logger.info(f"Detailed results saved to {csv_path}")
+    logger.info(f"Summary results saved to {summary_path}")
+    
+    # Optionally keep a columnar copy for faster re-reading in downstream analysis
+    if SAVE_PARQUET:
+        parquet_path = csv_path[:-len(".csv")] + ".parquet"
+        pd.read_csv(csv_path).to_parquet(parquet_path, engine="pyarrow", compression="zstd")
+        logger.info(f"Detailed results saved to {parquet_path}")
     
     return all_results
 
+def _evaluate_model(model: str, embedding_type: str, all_results: dict, write_row: Callable):
+    """
+    Evaluate one model and embedding type, recording its summary and detailed rows
+
+    Args:
+        model (str): Chat completion model to use
+        embedding_type (str): Type of embedding to use ("hf" or "openai")
+        all_results (dict): Summary results by "<model>_<embedding_type>", updated in place
+        write_row (Callable): Saves one detailed per-question result row
+    """
+    start_time = time.time()
+    logger.info(f"Starting evaluation for model: {model} with {embedding_type} embeddings")
+    
+    def save_outcome(i, context_texts, answer):
+        if not isinstance(answer, Exception):
+            # Store detailed results
+            write_row({
+                'model': model,
+                'embedding_type': embedding_type,
+                'question': QUESTIONS[i],
+                'ground_truth': GROUND_TRUTH[i],
+                'retrieved_contexts': '\n'.join(context_texts),
+                'generated_answer': answer,
+                'success': True
+            })
+        else:
+            # Store failed attempt details
+            write_row({
+                'model': model,
+                'embedding_type': embedding_type,
+                'question': QUESTIONS[i],
+                'ground_truth': GROUND_TRUTH[i],
+                'retrieved_contexts': '',
+                'generated_answer': '',
+                'success': False,
+                'error': str(answer)
+            })
+    
+    try:
+        data = {
+            "question": QUESTIONS,
+            "ground_truth": GROUND_TRUTH,
+            "contexts": [],
+            "answer": []
+        }
+
+        rag_chain = get_rag_chain(model)
+
+        success_count = 0
+        error_count = 0
+        
+        # Retrieve contexts for all questions up front, in batched requests
+        all_contexts = retrieve_similar_documents_batch(QUESTIONS, embedding_type, LIMIT, projection={"answer": 1})
+        
+        # Generate the answer for every question concurrently, saving each detailed
+        # result as soon as it is ready
+        outcomes = asyncio.run(process_questions(
+            rag_chain, all_contexts, desc=f"Processing questions for {model} with {embedding_type}",
+            on_result=save_outcome
+        ))
+        
+        for question, (context_texts, answer) in zip(QUESTIONS, outcomes):
+            if not isinstance(answer, Exception):
+                data["contexts"].append(context_texts)
+                data["answer"].append(answer)
+                success_count += 1
+            else:
+                logger.error(f"Error processing question '{question}': {str(answer)}")
+                error_count += 1
+                # Add empty results for failed questions
+                data["answer"].append("")
+                data["contexts"].append([])
+
+        # RAGAS evaluation, on an Arrow table built directly from the column lists
+        dataset = Dataset(pa.table(data))
+        # Concurrent metric calls, retried with backoff on rate limits
+        run_config = RunConfig(max_workers=RAGAS_WORKERS, max_wait=180, timeout=120)
+        
+        result = evaluate(
+            dataset=dataset,
+            metrics=[faithfulness, answer_relevancy],
+            run_config=run_config,
+            raise_exceptions=False,
+        )
+        
+        elapsed_time = time.time() - start_time
+        
+        # Calculate mean scores if metrics are lists
+        faithfulness_score = float(result['faithfulness']) if isinstance(result['faithfulness'], (int, float)) else float(sum(result['faithfulness']) / len(result['faithfulness']))
+        answer_relevancy_score = float(result['answer_relevancy']) if isinstance(result['answer_relevancy'], (int, float)) else float(sum(result['answer_relevancy']) / len(result['answer_relevancy']))
+        
+        # Log results
+        logger.info(f"Results for {model} with {embedding_type} embeddings:")
+        logger.info(f"- Success rate: {success_count}/{len(QUESTIONS)} ({success_count/len(QUESTIONS)*100:.2f}%)")
+        logger.info(f"- Error rate: {error_count}/{len(QUESTIONS)} ({error_count/len(QUESTIONS)*100:.2f}%)")
+        logger.info(f"- Time taken: {elapsed_time:.2f} seconds")
+        logger.info(f"- Metrics: Faithfulness={faithfulness_score:.3f}, Answer Relevancy={answer_relevancy_score:.3f}")
+        
+        all_results[f"{model}_{embedding_type}"] = {
+            "metrics": {
+                "faithfulness": faithfulness_score,
+                "answer_relevancy": answer_relevancy_score
+            },
+            "success_rate": success_count/len(QUESTIONS),
+            "error_rate": error_count/len(QUESTIONS),
+            "time_taken": elapsed_time
+        }
+        
+    except Exception as e:
+        logger.error(f"Error evaluating model {model} with {embedding_type}: {str(e)}")
+    
+
 def visualize_results(results: dict):
     """
     Create and save visualizations of the evaluation results
@@ -238,27 +334,19 @@ def visualize_results(results: dict):
     try:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Create performance comparison plots
-        metrics_data = {
-            'Model': [],
-            'Metric': [],
-            'Score': []
-        }
-        
-        for model in results:
-            # Add metrics scores
-            metrics_data['Model'].append(model)
-            metrics_data['Model'].append(model)
-            metrics_data['Model'].append(model)
-            
-            metrics_data['Metric'].extend(['Faithfulness', 'Answer Relevancy', 'Success Rate'])
-            
-            metrics_data['Score'].append(results[model]['metrics']['faithfulness'])
-            metrics_data['Score'].append(results[model]['metrics']['answer_relevancy'])
-            metrics_data['Score'].append(results[model]['success_rate'])
+        # Create performance comparison plots: one row per (model, metric) score
+        rows = [
+            {'Model': model, 'Metric': metric, 'Score': score}
+            for model, result in results.items()
+            for metric, score in (
+                ('Faithfulness', result['metrics']['faithfulness']),
+                ('Answer Relevancy', result['metrics']['answer_relevancy']),
+                ('Success Rate', result['success_rate']),
+            )
+        ]
         
         # Convert to DataFrame for easier plotting
-        df = pd.DataFrame(metrics_data)
+        df = pd.DataFrame.from_records(rows, columns=['Model', 'Metric', 'Score'])
         
         # Create plot
         plt.figure(figsize=(12, 6))
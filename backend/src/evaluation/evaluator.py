@@ -10,6 +10,7 @@ The evaluation results are scored on a scale from 0 to 1 (normalized) and saved
 for future analysis and comparison.
 """
 from typing import Dict, Any, List
+import asyncio
 import os
 import json
 from datetime import datetime
@@ -83,14 +84,18 @@ async def evaluate_response(
         "context": context
     }
     
-    # Semantic similarity evaluation - compare to reference answer if available
+    # LLM-based evaluation - assess factual accuracy, relevance, completeness.
+    # Started first so the judge round-trip overlaps the local similarity computation
+    llm_task = asyncio.create_task(evaluate_with_llm(question, response, context))
+    
+    # Semantic similarity evaluation - compare to reference answer if available.
+    # Runs in a worker thread so the event loop stays free while the model runs
     if reference_answer:
-        results["semantic_similarity"] = calculate_similarity(
-            response, reference_answer
+        results["semantic_similarity"] = await asyncio.to_thread(
+            calculate_similarity, response, reference_answer
         )
     
-    # LLM-based evaluation - assess factual accuracy, relevance, completeness
-    llm_results = await evaluate_with_llm(question, response, context)
+    llm_results = await llm_task
     results["llm_evaluation"] = llm_results
     
     # Calculate overall confidence from combined metrics
@@ -5,8 +5,9 @@ This module provides metrics for evaluating the quality and performance of
 Retrieval-Augmented Generation (RAG) system responses. It implements two main
 evaluation approaches:
 
-1. Semantic Similarity: Uses sentence transformers to calculate embedding-based
-   similarity between texts (e.g., response and reference answer)
+1. Semantic Similarity: Uses the all-MiniLM-L6-v2 sentence transformer, run as an
+   int8-quantized ONNX Runtime model, to calculate embedding-based similarity
+   between texts (e.g., response and reference answer)
    
 2. LLM-based Evaluation: Leverages an LLM (e.g., OpenAI's models) to assess
    response quality across multiple dimensions including factual accuracy,
@@ -14,29 +15,166 @@ evaluation approaches:
 
 These metrics provide a comprehensive assessment of RAG system performance.
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
+from collections import OrderedDict
+import threading
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import instructor
+from pydantic import BaseModel, Field
+from optimum.onnxruntime import ORTModelForFeatureExtraction
+from transformers import AutoTokenizer
 from openai import AsyncOpenAI
 import os
 import logging
-import json
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Sentence transformer settings. The int8 model is built ahead of time with
+# `optimum-cli onnxruntime quantize`, by the Dockerfile and the deploy workflow
+_EMBEDDING_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+_backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+_EMBEDDING_MODEL_DIR = os.getenv(
+    "EMBEDDING_ONNX_MODEL_DIR",
+    os.path.join(_backend_root, "models/all-MiniLM-L6-v2-onnx-int8")
+)
+_EMBEDDING_MAX_LENGTH = 256
+_EMBEDDING_DIMENSIONS = 384
+
+# Tokenizer and model are loaded on first use, so importing this module stays cheap
+_tokenizer = None
+_embedding_model = None
+_embedding_model_lock = threading.Lock()
+
+def _get_embedding_model() -> Tuple[Any, ORTModelForFeatureExtraction]:
+    """
+    Get the tokenizer and the int8-quantized ONNX Runtime sentence transformer.
+    
+    Both are loaded on the first call and reused afterwards.
+    
+    Returns:
+        Tuple[Any, ORTModelForFeatureExtraction]: Tokenizer and model producing token embeddings
+        
+    Raises:
+        FileNotFoundError: If the quantized model has not been built
+    """
+    global _tokenizer, _embedding_model
+    with _embedding_model_lock:
+        if _embedding_model is None:
+            if not os.path.isdir(_EMBEDDING_MODEL_DIR):
+                raise FileNotFoundError(
+                    f"Quantized embedding model not found at {_EMBEDDING_MODEL_DIR}. Build it with "
+                    f"`optimum-cli onnxruntime quantize` (see the Dockerfile) or set EMBEDDING_ONNX_MODEL_DIR"
+                )
+            _tokenizer = AutoTokenizer.from_pretrained(_EMBEDDING_MODEL_ID)
+            _embedding_model = ORTModelForFeatureExtraction.from_pretrained(
+                _EMBEDDING_MODEL_DIR,
+                file_name="model_quantized.onnx",
+                provider="CPUExecutionProvider"
+            )
+            logger.info(f"Loaded quantized embedding model from {_EMBEDDING_MODEL_DIR}")
+        return _tokenizer, _embedding_model
+
 # Initialize global clients
-_sentence_transformer = SentenceTransformer("all-MiniLM-L6-v2")
-_openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_openai_client = instructor.patch(AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")))
+
+class Scores(BaseModel):
+    """Model for the LLM judge's scores of a RAG response."""
+    factual_accuracy: int = Field(..., description="Score 0-10: does the response align with facts in the context?")
+    relevance: int = Field(..., description="Score 0-10: how well does the response address the question?")
+    completeness: int = Field(..., description="Score 0-10: does the response cover all important aspects?")
+    context_usage: int = Field(..., description="Score 0-10: how well does it use the provided context?")
+
+# LRU cache of normalized embeddings keyed by whitespace-normalized text, so that
+# repeated questions and reference answers skip the model forward pass
+_EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 10000))
+_embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+def _mean_pool(last_hidden_state: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """
+    Average token embeddings over the non-padding tokens of each sequence.
+    
+    Args:
+        last_hidden_state (np.ndarray): Token embeddings, shape (batch, tokens, dim)
+        attention_mask (np.ndarray): 1 for real tokens and 0 for padding, shape (batch, tokens)
+        
+    Returns:
+        np.ndarray: Sentence embeddings, shape (batch, dim)
+    """
+    mask = attention_mask[..., None].astype(np.float32)
+    return (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+def _embed_texts(texts: List[str], batch_size: int) -> np.ndarray:
+    """
+    Run the sentence transformer over texts in batches.
+    
+    Args:
+        texts (List[str]): Texts to embed
+        batch_size (int): Number of texts per forward pass
+        
+    Returns:
+        np.ndarray: L2-normalized float32 embeddings, one row per input text
+    """
+    tokenizer, model = _get_embedding_model()
+    batches = []
+    for i in range(0, len(texts), batch_size):
+        inputs = tokenizer(
+            texts[i:i + batch_size],
+            padding=True,
+            truncation=True,
+            max_length=_EMBEDDING_MAX_LENGTH,
+            return_tensors="np"
+        )
+        outputs = model(**inputs)
+        pooled = _mean_pool(outputs.last_hidden_state, inputs["attention_mask"])
+        batches.append(pooled / np.linalg.norm(pooled, axis=1, keepdims=True))
+    return np.concatenate(batches).astype(np.float32)
+
+def _encode(texts: List[str], batch_size: int) -> np.ndarray:
+    """
+    Embed texts with the sentence transformer, reusing cached embeddings.
+    
+    Only texts missing from the cache are sent to the model, in a single batched
+    encode call. Whitespace differences do not change the tokenization, so texts are
+    cached by their whitespace-normalized form.
+    
+    Args:
+        texts (List[str]): Texts to embed
+        batch_size (int): Batch size for the encode call on cache misses
+        
+    Returns:
+        np.ndarray: L2-normalized embeddings, one row per input text
+    """
+    if not texts:
+        return np.empty((0, _EMBEDDING_DIMENSIONS), dtype=np.float32)
+    keys = [" ".join(text.split()) for text in texts]
+    with _embedding_cache_lock:
+        found = {key: _embedding_cache[key] for key in keys if key in _embedding_cache}
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    
+    if missing:
+        embeddings = _embed_texts(missing, batch_size)
+        for key, embedding in zip(missing, embeddings):
+            embedding.setflags(write=False)
+            found[key] = embedding
+    
+    with _embedding_cache_lock:
+        for key in keys:
+            _embedding_cache[key] = found[key]
+            _embedding_cache.move_to_end(key)
+        while len(_embedding_cache) > _EMBEDDING_CACHE_SIZE:
+            _embedding_cache.popitem(last=False)
+    return np.stack([found[key] for key in keys])
 
 def calculate_similarity(text1: str, text2: str) -> float:
     """
     Calculate semantic similarity between two texts using sentence transformers.
     
-    This function generates embeddings for both input texts using the SentenceTransformer
-    model and calculates their cosine similarity. The result is a score between 0 and 1,
-    where higher values indicate greater semantic similarity.
+    This function embeds both input texts in a single sentence transformer forward pass
+    (skipped for texts already in the embedding cache). The embeddings are
+    L2-normalized, so their cosine similarity is a single dot product. The result is a score between 0 and 1, where
+    higher values indicate greater semantic similarity.
     
     Args:
         text1 (str): First text to compare (e.g., generated response)
@@ -46,21 +184,43 @@ def calculate_similarity(text1: str, text2: str) -> float:
         float: Similarity score between 0 (completely different) and 1 (identical)
     """
     try:
-        # Generate embeddings for both texts
-        embedding1 = _sentence_transformer.encode([text1])[0]
-        embedding2 = _sentence_transformer.encode([text2])[0]
-        
-        # Calculate cosine similarity between the embeddings
-        similarity = cosine_similarity(
-            embedding1.reshape(1, -1),
-            embedding2.reshape(1, -1)
-        )[0][0]
+        # Generate normalized embeddings for both texts in one batch
+        embeddings = _encode([text1, text2], batch_size=2)
         
-        return float(similarity)
+        # Cosine similarity of unit vectors is their dot product
+        return float(embeddings[0] @ embeddings[1])
     except Exception as e:
         logger.error(f"Error calculating semantic similarity: {str(e)}")
         return 0.0
 
+def calculate_similarity_batch(pairs: List[Tuple[str, str]]) -> List[float]:
+    """
+    Calculate semantic similarity for many text pairs at once.
+    
+    All texts are embedded in a single batched encode call, and the per-pair
+    similarities are computed with one vectorized row-wise dot product of the
+    normalized embeddings.
+    
+    Args:
+        pairs (List[Tuple[str, str]]): Text pairs to compare, e.g. (response, reference)
+        
+    Returns:
+        List[float]: Similarity score for each pair, in input order
+    """
+    if not pairs:
+        return []
+    try:
+        # Flatten pairs into [a0, b0, a1, b1, ...] and embed them together
+        texts = [text for pair in pairs for text in pair]
+        embeddings = _encode(texts, batch_size=64)
+        
+        # Row-wise dot products between the first and second text of every pair
+        similarities = np.einsum('ij,ij->i', embeddings[0::2], embeddings[1::2])
+        return [float(similarity) for similarity in similarities]
+    except Exception as e:
+        logger.error(f"Error calculating semantic similarity batch: {str(e)}")
+        return [0.0] * len(pairs)
+
 async def evaluate_with_llm(
     question: str, 
     response: str, 
@@ -88,7 +248,7 @@ async def evaluate_with_llm(
     Returns:
         Dict[str, Any]: Evaluation results dictionary containing:
             - scores: Dictionary of numerical scores (0-10) for each evaluation dimension
-            - raw_response: The raw JSON response from the LLM
+            - raw_response: The scores as returned by the LLM, serialized as JSON
     """
     try:
         # Join context passages into a single text
@@ -105,23 +265,18 @@ Evaluate on the following criteria (score 0-10):
 1. Factual Accuracy: Does the response align with facts in the context?
 2. Relevance: How well does the response address the question?
 3. Completeness: Does the response cover all important aspects?
-4. Context Usage: How well does it use the provided context?
-
-Return only the scores in JSON format like this:
-{{"factual_accuracy": score, "relevance": score, "completeness": score, "context_usage": score}}"""
+4. Context Usage: How well does it use the provided context?"""
 
-        # Send evaluation request to OpenAI
-        completion = await _openai_client.chat.completions.create(
+        # Send evaluation request to OpenAI, constraining the output to the Scores model
+        scores = await _openai_client.chat.completions.create(
             model=model,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
+            response_model=Scores,
+            messages=[{"role": "user", "content": prompt}]
         )
         
-        # Parse JSON response and return scores
-        scores = json.loads(completion.choices[0].message.content)
         return {
-            "scores": scores,
-            "raw_response": completion.choices[0].message.content
+            "scores": scores.model_dump(),
+            "raw_response": scores.model_dump_json()
         }
         
     except Exception as e:
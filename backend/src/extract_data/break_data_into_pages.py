@@ -1,39 +1,61 @@
-import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import ijson
+import orjson
+
+OUTPUT_FOLDER = "data/pages"
+WRITE_WORKERS = 32
+
+# Any character that is neither alphanumeric, a space nor an underscore
+_UNSAFE_RE = re.compile(r"[^\w ]")
+
+def _page_path(i, page):
+    """Return the output path of one page entry, named after its title."""
+    # Try to extract a title from the metadata for naming.
+    metadata = page.get("metadata", {})
+    title = metadata.get("title", f"page_{i}")
+    
+    # Create a safe file name by only allowing alphanumeric characters and underscores.
+    safe_title = _UNSAFE_RE.sub("_", title).strip().replace(" ", "_")
+    if not safe_title:
+        safe_title = f"page_{i}"
+    
+    filename = f"{safe_title}.json"
+    return os.path.join(OUTPUT_FOLDER, filename)
+
+def _write_page(output_path, page):
+    """Save one page entry (including metadata) as a separate JSON file."""
+    # Save the page's data (including metadata) as a separate, compact JSON file.
+    # Use pretty.py to inspect a page in indented form.
+    with open(output_path, "wb") as out_f:
+        out_f.write(orjson.dumps(page, option=orjson.OPT_NON_STR_KEYS))
+    
+    print(f"Saved: {output_path}")
 
 def break_data_into_pages():
     # Specify the path to your JSON file.
     input_file = "data/raw/crawl_status_20250408_232747.json"
     
-    # Load the JSON data.
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
     # Create a new folder called "pages" if it doesn't already exist.
-    output_folder = "data/pages"
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+    if not os.path.exists(OUTPUT_FOLDER):
+        os.makedirs(OUTPUT_FOLDER)
     
-    # Iterate over each page entry in the data.
-    # Each entry is stored in data["data"].
-    for i, page in enumerate(data.get("data", [])):
-        # Try to extract a title from the metadata for naming.
-        metadata = page.get("metadata", {})
-        title = metadata.get("title", f"page_{i}")
-        
-        # Create a safe file name by only allowing alphanumeric characters and underscores.
-        safe_title = "".join(c if c.isalnum() or c in (" ", "_") else "_" for c in title).strip().replace(" ", "_")
-        if not safe_title:
-            safe_title = f"page_{i}"
-        
-        filename = f"{safe_title}.json"
-        output_path = os.path.join(output_folder, filename)
-        
-        # Save the page's data (including metadata) as a separate JSON file.
-        with open(output_path, "w", encoding="utf-8") as out_f:
-            json.dump(page, out_f, ensure_ascii=False, indent=4)
-        
-        print(f"Saved: {output_path}")
+    # Stream each page entry (stored in data["data"]) from the input instead of loading
+    # the whole file, and write the pages chunk by chunk across a pool of threads so
+    # the file writes overlap while only a bounded number of pages is held in memory.
+    with open(input_file, "rb") as f, ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        pages = enumerate(ijson.items(f, "data.item", use_float=True))
+        while True:
+            chunk = list(islice(pages, WRITE_WORKERS * 4))
+            if not chunk:
+                break
+            # Pages sharing a title map to the same file. Resolve paths serially and
+            # keep only the last page per path, so no two threads write the same file
+            # and the last page wins, as when writing pages one by one.
+            latest = {_page_path(i, page): page for i, page in chunk}
+            list(executor.map(lambda item: _write_page(*item), latest.items()))
 
 if __name__ == "__main__":
     break_data_into_pages()
@@ -1,5 +1,5 @@
 import os
-import json
+import orjson
 from firecrawl import FirecrawlApp
 from pathlib import Path
 import time
@@ -13,7 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.logger import setup_logger
 
 # Set up logger
-logger = setup_logger(name="fire_crawler", log_to_file=True)
+logger = setup_logger(name="fire_crawler", log_to_file=True, buffered=True)
 
 def run_crawler():
     """
@@ -61,9 +61,9 @@ def run_crawler():
             poll_interval=30
         )
         
-        # Save the crawl status response
-        with open(crawl_status_path, "w") as f:
-            json.dump(crawl_status, f, indent=2)
+        # Save the crawl status response as compact JSON (pretty.py prints it indented)
+        with open(crawl_status_path, "wb") as f:
+            f.write(orjson.dumps(crawl_status, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE))
         
         logger.info(f"Saved crawl status to: {crawl_status_path}")
         
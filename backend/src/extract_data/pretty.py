@@ -0,0 +1,14 @@
+import json
+import sys
+
+def pretty_print(path):
+    """Print a compact JSON file (e.g. a page written by break_data_into_pages) indented, for debugging."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    print(json.dumps(data, ensure_ascii=False, indent=4))
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python pretty.py <file.json>")
+        sys.exit(1)
+    pretty_print(sys.argv[1])
@@ -9,16 +9,20 @@ for generating answers to user questions. It creates a pipeline that:
 3. Generates a response using an LLM (OpenAI)
 4. Returns the generated answer along with reference source URLs
 
+Answers are cached by question embedding (see utils/answer_cache.py), so paraphrases
+of an already-answered question skip retrieval and the LLM call.
+
 The module uses LangChain to build the RAG pipeline, making it easy to customize
 and extend the generation process.
 """
 import os
 import sys
 import dotenv
+from functools import lru_cache
 from typing import Dict, List, Tuple
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 
 # Add the src directory to the Python path to enable imports
@@ -27,7 +31,8 @@ sys.path.insert(0, src_dir)
 
 # Import local utilities
 from utils.logger import setup_logger
-from utils.retriever_client import retrieve_similar_documents
+from utils.retriever_client import retrieve_similar_documents, embed_query
+from utils.answer_cache import lookup_cached_answer, store_cached_answer
 
 # Load environment variables
 dotenv.load_dotenv()
@@ -35,41 +40,8 @@ dotenv.load_dotenv()
 # Set up logger
 logger = setup_logger(name="RAG Generation", log_to_file=True)
 
-def get_rag_chain(model: str = None) -> RunnablePassthrough:
-    """
-    Create a complete RAG chain for generating answers to questions.
-    
-    This function builds a LangChain pipeline that:
-    1. Takes a user question as input
-    2. Retrieves relevant documents using vector similarity search
-    3. Formats the question and retrieved documents into a prompt
-    4. Sends the prompt to the LLM
-    5. Returns the generated response
-    
-    The chain follows this structure:
-    retrieve → prompt → llm → output_parser
-    
-    Args:
-        model (str, optional): The OpenAI model name to use. If not provided,
-                              defaults to the OPENAI_MODEL env variable or "gpt-4o"
-        
-    Returns:
-        RunnablePassthrough: A fully configured RAG chain that can be invoked with a question
-    """
-    try:
-        # Use environment variable if model not specified
-        model = model or os.getenv('OPENAI_MODEL', 'gpt-4o')
-        logger.info(f"Creating RAG chain with model: {model}")
-        
-        # Generate context using the retriever
-        # This step creates a dictionary with the original question and retrieved context
-        retrieve = {
-            "context": lambda x: "\n\n".join([doc['content'] for doc in retrieve_similar_documents(x, "openai", 3)]),
-            "question": RunnablePassthrough()
-        }
-
-        # Define the prompt template with detailed instructions for the LLM
-        template = """You have to reply in markdown format. You are an empathetic Voy Health customer agent. Address the question first and then Answer the question based only on the following context. 
+# Define the prompt template with detailed instructions for the LLM
+_TEMPLATE = """You have to reply in markdown format. You are an empathetic Voy Health customer agent. Address the question first and then Answer the question based only on the following context. 
         If the person is having a normal conversation then go ahead; however, if the user is asking any question
         and If there is no relevant content in the context to answer the question, respond that you don't have enough information to answer accurately.
         
@@ -88,10 +60,54 @@ def get_rag_chain(model: str = None) -> RunnablePassthrough:
 
         Provide a clear, direct answer based solely on the context provided. Do not make assumptions or add information not present in the context.
         """
+
+# Parse the prompt template once; it is shared by every chain
+_PROMPT = ChatPromptTemplate.from_template(_TEMPLATE)
+
+def get_rag_chain(model: str = None) -> RunnableSequence:
+    """
+    Get the RAG chain for a model, building it on first use.
+    
+    Chains are stateless, so one chain (and its OpenAI client and connection pool) is
+    built per model and shared by all callers.
+    
+    Args:
+        model (str, optional): The OpenAI model name to use. If not provided,
+                              defaults to the OPENAI_MODEL env variable or "gpt-4o"
         
-        # Create the prompt template for formatting retrieved contexts with the question
-        prompt = ChatPromptTemplate.from_template(template)
-        logger.debug("Created prompt template")
+    Returns:
+        RunnableSequence: A fully configured RAG chain that can be invoked with
+                          {"context": str, "question": str}
+    """
+    # Use environment variable if model not specified
+    return _build_rag_chain(model or os.getenv('OPENAI_MODEL', 'gpt-4o'))
+
+@lru_cache(maxsize=8)
+def _build_rag_chain(model: str) -> RunnableSequence:
+    """
+    Create a complete RAG chain for generating answers to questions.
+    
+    This function builds a LangChain pipeline that:
+    1. Takes a user question and its already-retrieved context as input
+    2. Formats the question and retrieved documents into a prompt
+    3. Sends the prompt to the LLM
+    4. Returns the generated response
+    
+    The chain follows this structure:
+    prompt → llm → output_parser
+    
+    Retrieval is done by the caller (see generate_answer), which also needs the
+    documents for reference URLs, so each question is retrieved only once.
+    
+    Args:
+        model (str): The OpenAI model name to use
+        
+    Returns:
+        RunnableSequence: A fully configured RAG chain that can be invoked with
+                          {"context": str, "question": str}
+    """
+    try:
+        logger.info(f"Creating RAG chain with model: {model}")
         
         # Initialize the language model with specified parameters
         llm = ChatOpenAI(temperature=0, model=model)
@@ -102,8 +118,7 @@ def get_rag_chain(model: str = None) -> RunnablePassthrough:
 
         # Create and return the complete RAG chain
         rag_chain = (
-            retrieve  # Get question and retrieved documents
-            | prompt  # Format into prompt template
+            _PROMPT  # Format question and retrieved documents into prompt template
             | llm     # Send to LLM
             | output_parser  # Parse response
         )
@@ -115,18 +130,33 @@ def get_rag_chain(model: str = None) -> RunnablePassthrough:
         logger.error(f"Error creating RAG chain: {str(e)}")
         raise
 
-def generate_answer(question: str) -> Tuple[str, List[str]]:
+def _chain_model(rag_chain: RunnableSequence) -> str:
+    """
+    Get the name of the chat model used by a chain built by get_rag_chain.
+    
+    Args:
+        rag_chain (RunnableSequence): Chain of the form prompt → llm → output_parser
+        
+    Returns:
+        str: The chat model name
+    """
+    return rag_chain.middle[0].model_name
+
+def generate_answer(question: str, rag_chain: RunnableSequence = None) -> Tuple[str, List[str]]:
     """
     Generate an answer for a given question using the RAG pipeline.
     
     This function:
-    1. Retrieves relevant documents from the vector database
-    2. Extracts reference URLs from the documents
-    3. Creates and executes the RAG pipeline to generate an answer
-    4. Returns both the generated answer and reference sources
+    1. Embeds the question once and checks the semantic answer cache
+    2. On a cache miss, retrieves relevant documents from the vector database
+    3. Extracts reference URLs from the documents
+    4. Executes the RAG pipeline to generate an answer and caches it
+    5. Returns both the generated answer and reference sources
     
     Args:
         question (str): The user's question to be answered
+        rag_chain (RunnableSequence, optional): A prebuilt chain from get_rag_chain.
+                                                If not provided, the cached default chain is used
         
     Returns:
         Tuple[str, List[str]]: A tuple containing:
@@ -139,8 +169,21 @@ def generate_answer(question: str) -> Tuple[str, List[str]]:
     try:
         logger.info(f"Generating answer for question: '{question}'")
         
-        # First, retrieve the most relevant documents from the database
-        docs = retrieve_similar_documents(question, "openai", 3)
+        # Get the configured (cached) RAG chain, unless one was passed in
+        if rag_chain is None:
+            rag_chain = get_rag_chain()
+        model = _chain_model(rag_chain)
+        
+        # Embed the question once; the embedding serves both the cache lookup and retrieval
+        query_embedding = embed_query(question, "openai")
+        
+        # Return a cached answer to a semantically equivalent question, if any
+        cached = lookup_cached_answer(query_embedding, model)
+        if cached is not None:
+            return cached
+        
+        # Otherwise, retrieve the most relevant documents from the database
+        docs = retrieve_similar_documents(question, "openai", 3, query_embedding=query_embedding)
         
         # Extract reference URLs from the retrieved documents for citation
         reference_urls = [doc['page_url'] for doc in docs]
@@ -151,13 +194,15 @@ def generate_answer(question: str) -> Tuple[str, List[str]]:
             logger.warning("No relevant documents found")
             return "I apologize, but I couldn't find any relevant information to answer your question accurately.", []
         
-        # Get the configured RAG chain
-        rag_chain = get_rag_chain()
-        
-        # Generate the answer by invoking the chain with the question
-        answer = rag_chain.invoke(question)
+        # Generate the answer by invoking the chain with the question and the documents
+        # retrieved above
+        context = "\n\n".join(doc['content'] for doc in docs)
+        answer = rag_chain.invoke({"context": context, "question": question})
         logger.info("Successfully generated answer")
         
+        # Cache the answer for later paraphrases of this question
+        store_cached_answer(question, query_embedding, model, answer, reference_urls)
+        
         return answer, reference_urls
         
     except Exception as e:
@@ -1,19 +1,81 @@
 import os
-import json
-from typing import List
-from instructor_ai import extract_faq_from_content, FAQPage 
+import asyncio
+import ijson
+from selectolax.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from instructor_ai import aextract_faq_from_content, FAQPage 
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 from src.utils.logger import setup_logger
 
 
-logger = setup_logger(name="extract_faq_from_content", log_to_file=True)
+logger = setup_logger(name="extract_faq_from_content", log_to_file=True, buffered=True)
 
-def extract_faqs_from_pages(folder_path: str = "data/pages") -> List[FAQPage]:
+EXTRACTION_CONCURRENCY = int(os.getenv("FAQ_EXTRACT_WORKERS", 16))
+READ_WORKERS = 16
+
+# Maximum characters of page content sent to the LLM (roughly 4 characters per token)
+MAX_CONTENT_CHARS = int(os.getenv("FAQ_EXTRACT_MAX_CHARS", 48000))
+
+# JSON paths of the page fields used for extraction
+_PAGE_FIELDS = {"metadata.url": "url", "metadata.title": "title", "markdown": "markdown", "html": "html"}
+
+def _to_text(markdown: str, html: str) -> str:
+    """
+    Return the page content to extract from: the markdown if present, otherwise the
+    visible text of the HTML, so tags, scripts and styles are not sent to the LLM.
+    The result is truncated to MAX_CONTENT_CHARS.
+    """
+    if markdown:
+        text = markdown
+    elif html:
+        tree = HTMLParser(html)
+        for node in tree.css("script, style, noscript"):
+            node.decompose()
+        root = tree.body or tree.root
+        text = root.text(separator=" ", strip=True) if root is not None else ""
+    else:
+        text = ""
+    return text[:MAX_CONTENT_CHARS]
+
+def _read_page(file_path: str) -> Optional[Tuple[str, str, str, str]]:
+    """
+    Read a page JSON file and pull out the fields needed for extraction.
+    
+    The file is stream-parsed, so only the URL, title, markdown and html strings are
+    materialized. Parsing stops once the URL, title and a non-empty markdown have been
+    seen, since the html is then not needed; otherwise the whole file is read.
+    
+    Returns:
+        (file_path, url, title, content), or None if the file is unusable.
+    """
+    try:
+        fields = {}
+        with open(file_path, "rb") as f:
+            for prefix, event, value in ijson.parse(f):
+                if event == "string" and prefix in _PAGE_FIELDS:
+                    fields[_PAGE_FIELDS[prefix]] = value
+                    if "url" in fields and "title" in fields and fields.get("markdown"):
+                        break
+        url = fields.get("url", "")
+        title = fields.get("title", "")
+        content = _to_text(fields.get("markdown"), fields.get("html"))
+        if not (url and title and content):
+            logger.warning(f"Missing URL, title or content in file: {file_path}")
+            return None
+        return file_path, url, title, content
+    except Exception as e:
+        logger.error(f"Error processing file '{file_path}': {e}")
+        return None
+
+async def aextract_faqs_from_pages(folder_path: str = "data/pages") -> List[FAQPage]:
     """
     Scan the specified folder for JSON files, extract URL, title, and content (using the 'markdown'
-    field if available, otherwise 'html') from each file's metadata, and run OpenAI extraction 
-    to obtain FAQPage objects.
+    field if available, otherwise the visible text of 'html') from each file's metadata, and run OpenAI extraction 
+    to obtain FAQPage objects. Files are read in a thread pool, and extraction requests
+    run concurrently, with at most EXTRACTION_CONCURRENCY (env FAQ_EXTRACT_WORKERS)
+    in flight.
     
     Returns:
         A list of FAQPage objects.
@@ -23,23 +85,35 @@ def extract_faqs_from_pages(folder_path: str = "data/pages") -> List[FAQPage]:
         logger.error(f"Folder '{folder_path}' does not exist.")
         return faq_pages
 
-    for filename in os.listdir(folder_path):
-        if not filename.lower().endswith(".json"):
-            continue
-        file_path = os.path.join(folder_path, filename)
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                page_data = json.load(f)
-            metadata = page_data.get("metadata", {})
-            url = metadata.get("url", "")
-            title = metadata.get("title", "")
-            content = page_data.get("markdown") or page_data.get("html", "")
-            if not (url and title and content):
-                logger.warning(f"Missing URL, title or content in file: {file_path}")
-                continue
+    with os.scandir(folder_path) as entries:
+        file_paths = [
+            entry.path
+            for entry in entries
+            if entry.name.lower().endswith(".json") and entry.is_file()
+        ]
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        pages = [page for page in executor.map(_read_page, file_paths) if page is not None]
+
+    sem = asyncio.Semaphore(EXTRACTION_CONCURRENCY)
+
+    async def run(file_path, url, title, content):
+        async with sem:
             logger.info(f"Processing file: {file_path}")
-            faq_page = extract_faq_from_content(url, title, content)
-            faq_pages.append(faq_page)
-        except Exception as e:
-            logger.error(f"Error processing file '{file_path}': {e}")
+            return await aextract_faq_from_content(url, title, content)
+
+    results = await asyncio.gather(*(run(*page) for page in pages), return_exceptions=True)
+    for (file_path, *_), result in zip(pages, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error processing file '{file_path}': {result}")
+            continue
+        faq_pages.append(result)
     return faq_pages
+
+def extract_faqs_from_pages(folder_path: str = "data/pages") -> List[FAQPage]:
+    """
+    Synchronous entry point for aextract_faqs_from_pages.
+    
+    Returns:
+        A list of FAQPage objects.
+    """
+    return asyncio.run(aextract_faqs_from_pages(folder_path))
@@ -1,21 +1,64 @@
 import os
-import json
 import re
 import pprint
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from instructor_ai import FAQPage 
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 from src.utils.logger import setup_logger
 
+# Parse page files with orjson when available; json.loads also accepts the raw bytes
+try:
+    from orjson import loads as _loads_json
+except ImportError:
+    from json import loads as _loads_json
 
-logger = setup_logger(name="extract_faq_from_content", log_to_file=True)
+
+logger = setup_logger(name="extract_faq_from_content", log_to_file=True, buffered=True)
+
+# Page boilerplate removed from the markdown in a single pass: "Skip to main content"
+# lines, and everything from the "Related articles" section to the end of the page
+_BOILERPLATE_RE = re.compile(r'\[Skip to main content\].*?\n|## Related articles[\s\S]*$')
+
+# Threads used to read and parse page files
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+def _process(file_path: str) -> Optional[dict]:
+    """
+    Read a page JSON file and build its FAQ entry from the title and cleaned markdown.
+    
+    Returns:
+        The FAQ entry as a dict, or None if the file is unusable.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            page_data = _loads_json(f.read())
+        metadata = page_data.get("metadata", {})
+        url = metadata.get("url", "")
+        title = metadata.get("title", "")
+        content = page_data.get("markdown")
+        content = _BOILERPLATE_RE.sub('', content)
+        if not (url and title and content):
+            logger.warning(f"Missing URL, title or content in file: {file_path}")
+            return None
+        logger.info(f"Processing file: {file_path}")
+        return {
+            "page_url": url,
+            "page_title": title,
+            "question": title,
+            "answer": content,
+            "confidence": 'N/A'
+        }
+    except Exception as e:
+        logger.error(f"Error processing file '{file_path}': {e}")
+        return None
 
 def extract_faqs_from_pages_regex(folder_path: str = "data/pages") -> List[dict]:
     """
     Scan the specified folder for JSON files, extract URL, title, and content (using the 'markdown'
     field if available, otherwise 'html') from each file's metadata, and run OpenAI extraction 
-    to obtain FAQPage objects.
+    to obtain FAQPage objects. Files are read and parsed in a thread pool.
     
     Returns:
         A list of FAQPage objects.
@@ -25,34 +68,15 @@ def extract_faqs_from_pages_regex(folder_path: str = "data/pages") -> List[dict]
         logger.error(f"Folder '{folder_path}' does not exist.")
         return faq_pages
 
-    for filename in os.listdir(folder_path):
-        if not filename.lower().endswith(".json"):
-            continue
-        file_path = os.path.join(folder_path, filename)
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                page_data = json.load(f)
-            metadata = page_data.get("metadata", {})
-            url = metadata.get("url", "")
-            title = metadata.get("title", "")
-            content = page_data.get("markdown")
-            content = re.sub(r'\[Skip to main content\].*?\n', '', content)
-            content = re.sub(r'## Related articles[\s\S]*$', '', content)
-            if not (url and title and content):
-                logger.warning(f"Missing URL, title or content in file: {file_path}")
-                continue
-            logger.info(f"Processing file: {file_path}")            
-            faq_page = {
-                        "page_url": url,
-                        "page_title": title,
-                        "question": title,
-                        "answer": content,
-                        "confidence": 'N/A'
-                    }
-            faq_pages.append(faq_page)
-        
-        except Exception as e:
-            logger.error(f"Error processing file '{file_path}': {e}")
+    with os.scandir(folder_path) as entries:
+        file_paths = [
+            entry.path
+            for entry in entries
+            if entry.name.lower().endswith(".json") and entry.is_file()
+        ]
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        faq_pages = [faq_page for faq_page in executor.map(_process, file_paths) if faq_page is not None]
     return faq_pages
 
-extract_faqs_from_pages_regex()
\ No newline at end of file
+if __name__ == "__main__":
+    extract_faqs_from_pages_regex()
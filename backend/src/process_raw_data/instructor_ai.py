@@ -1,6 +1,6 @@
 import os
 import instructor
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from pydantic import BaseModel, Field
 from typing import List
 import dotenv
@@ -11,6 +11,7 @@ dotenv.load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 model = os.getenv("OPENAI_MODEL", "gpt-4o")
 client = instructor.patch(OpenAI(api_key=api_key))
+aclient = instructor.patch(AsyncOpenAI(api_key=api_key))
 
 class FAQItem(BaseModel):
     """Model for FAQ item with question and answer."""
@@ -26,6 +27,31 @@ class FAQPage(BaseModel):
     is_faq_page: bool = Field(..., description="Whether this page contains FAQ content")
     faq_items: List[FAQItem] = Field(default=[], description="List of FAQ items found on the page")
 
+def _build_messages(url: str, title: str, content: str) -> List[dict]:
+    """
+    Build the chat messages asking the model to extract FAQ content from a page.
+    
+    Args:
+        url: The URL of the page.
+        title: The title of the page.
+        content: The content (markdown or HTML) of the page.
+        
+    Returns:
+        List of chat messages for the completion request.
+    """
+    return [
+        {"role": "system", "content": """You are an AI assistant that extracts FAQ context from html or markdown file.
+                                             You are not allowed to change anything in the text. 
+                                             You will be given an html or markdown webpage which should contain one question and one detailed answer
+                                             Your Task:
+                                             You have to identify one question and one detailed answer and respond without changing any word from it
+                                             You need to strictly determine if a page is a true FAQ page with proper questions and detailed answers.
+                                             Pages that only contain links should NOT be considered FAQ pages.
+                                             A true FAQ page should have clearly formatted questions followed by comprehensive answers that provide value."""
+                                     },
+        {"role": "user", "content": f"Extract FAQ content from this page:\n\nURL: {url}\nTitle: {title}\n\nContent:\n{content}"}
+    ]
+
 def extract_faq_from_content(url: str, title: str, content: str) -> FAQPage:
     """
     Extract FAQ items from page content using the patched OpenAI client.
@@ -43,18 +69,31 @@ def extract_faq_from_content(url: str, title: str, content: str) -> FAQPage:
         faq_page = client.chat.completions.create(
             model=model,
             response_model=FAQPage,
-            messages=[
-                {"role": "system", "content": """You are an AI assistant that extracts FAQ context from html or markdown file.
-                                             You are not allowed to change anything in the text. 
-                                             You will be given an html or markdown webpage which should contain one question and one detailed answer
-                                             Your Task:
-                                             You have to identify one question and one detailed answer and respond without changing any word from it
-                                             You need to strictly determine if a page is a true FAQ page with proper questions and detailed answers.
-                                             Pages that only contain links should NOT be considered FAQ pages.
-                                             A true FAQ page should have clearly formatted questions followed by comprehensive answers that provide value."""
-                                             },
-                {"role": "user", "content": f"Extract FAQ content from this page:\n\nURL: {url}\nTitle: {title}\n\nContent:\n{content}"}
-            ]
+            messages=_build_messages(url, title, content)
+        )
+        return faq_page
+    except Exception as e:
+        # Return an empty FAQPage upon error.
+        return FAQPage(url=url, title=title, is_faq_page=False, faq_items=[])
+
+async def aextract_faq_from_content(url: str, title: str, content: str) -> FAQPage:
+    """
+    Asynchronously extract FAQ items from page content using the patched AsyncOpenAI client.
+    
+    Args:
+        url: The URL of the page.
+        title: The title of the page.
+        content: The content (markdown or HTML) of the page.
+        
+    Returns:
+        FAQPage object containing the extracted FAQ items.
+    """
+    try:
+        # Use OpenAI to extract FAQ content.
+        faq_page = await aclient.chat.completions.create(
+            model=model,
+            response_model=FAQPage,
+            messages=_build_messages(url, title, content)
         )
         return faq_page
     except Exception as e:
@@ -1,5 +1,5 @@
-from typing import List
-import pandas as pd
+import csv
+from typing import Iterable, Iterator, Union
 from loguru import logger
 from instructor_ai import FAQPage 
 import os
@@ -11,60 +11,74 @@ dotenv.load_dotenv()
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 from src.utils.logger import setup_logger
+from src.utils.fs import ensure_dir
 # from src.process_raw_data.extract_faq_from_content import extract_faqs_from_pages
 from src.process_raw_data.generate_dataset_using_regex import extract_faqs_from_pages_regex
 
-logger = setup_logger(name="save_faq_to_csv", log_to_file=True)
+logger = setup_logger(name="save_faq_to_csv", log_to_file=True, buffered=True)
 
-def save_faqs_to_csv(faq_pages: List[dict], output_path: str):
+FAQ_CSV_FIELDS = ["page_url", "page_title", "question", "answer", "confidence"]
+
+def _row_iter(faq_pages: Iterable[Union[dict, FAQPage]]) -> Iterator[dict]:
     """
-    Save extracted FAQ items into a CSV file.
+    Yield one CSV row per FAQ item.
     
     Args:
-        faq_pages: List of dictionaries containing FAQ data.
-        output_path: Path to save the CSV file.
+        faq_pages: FAQ dictionaries or FAQPage objects.
     """
-    logger.info(f"Saving FAQ items to CSV: {output_path}")
-    logger.info(f"Received {len(faq_pages)} FAQ pages to process")
-    
-    # Create output directory if it doesn't exist
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    rows = []
     for page in faq_pages:
-        # Handle both dictionary and FAQPage object formats
+        # Handle both dictionary and FAQPage object formats. Dictionaries are written
+        # as they are; the writer picks out the CSV columns
         if isinstance(page, dict):
             logger.debug(f"Processing dictionary FAQ: {page['page_title']}")
-            rows.append({
-                "page_url": page["page_url"],
-                "page_title": page["page_title"],
-                "question": page["question"],
-                "answer": page["answer"],
-                "confidence": page["confidence"]
-            })
+            yield page
         else:
             # Original FAQPage object handling
             logger.debug(f"Processing FAQ items from page: {page.page_url}")
             if page.is_faq_page:
                 for item in page.faq_items:
                     if item.is_faq:
-                        rows.append({
+                        yield {
                             "page_url": page.page_url,
                             "page_title": page.page_title,
                             "question": item.question,
                             "answer": item.answer,
                             "confidence": item.confidence
-                        })
+                        }
             else:
                 logger.debug(f"Skipping non-FAQ page: {page.page_url}")
+
+def save_faqs_to_csv(faq_pages: Iterable[Union[dict, FAQPage]], output_path: str):
+    """
+    Save extracted FAQ items into a CSV file.
     
-    if rows:
-        df = pd.DataFrame(rows)
-        logger.info(f"Created DataFrame with {len(df)} rows and columns: {', '.join(df.columns)}")
-        df.to_csv(output_path, index=False)
-        logger.info(f"Saved {len(rows)} FAQ items to {output_path}")
-    else:
+    Rows are streamed to the file one at a time, so faq_pages can be any iterable,
+    including a generator, and no intermediate list or DataFrame is built.
+    
+    Args:
+        faq_pages: Iterable of dictionaries containing FAQ data, or FAQPage objects.
+        output_path: Path to save the CSV file.
+    """
+    logger.info(f"Saving FAQ items to CSV: {output_path}")
+    
+    rows = _row_iter(faq_pages)
+    first_row = next(rows, None)
+    if first_row is None:
         logger.warning("No FAQ items found to save to CSV")
+        return
+    
+    # Create output directory if it doesn't exist
+    ensure_dir(os.path.dirname(output_path))
+    
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FAQ_CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerow(first_row)
+        row_count = 1
+        for row in rows:
+            writer.writerow(row)
+            row_count += 1
+    logger.info(f"Saved {row_count} FAQ items to {output_path}")
 
 if __name__ == "__main__":
     logger.info("Starting FAQ extraction and CSV creation process")
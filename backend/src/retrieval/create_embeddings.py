@@ -1,5 +1,9 @@
 import os
 import sys
+from collections import defaultdict
+from hashlib import blake2b
+from pymongo import UpdateMany
+from pymongo.write_concern import WriteConcern
 
 # Add the src directory to the Python path to enable imports
 src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -8,27 +12,32 @@ sys.path.insert(0, src_dir)
 # Import utilities
 from utils.logger import setup_logger
 from utils.mongo_client import get_collection
-from utils.hf_embeddings import generate_hf_embedding 
+from utils.hf_embeddings import generate_hf_embedding, generate_hf_embeddings
 from utils.openai_embeddings import generate_openai_embedding
+from utils.answer_cache import clear_answer_cache
+from utils.quantization import encode_vector
 
 # Set up logger
-logger = setup_logger(name="FAQ Embedding Generation", log_to_file=True)
+logger = setup_logger(name="FAQ Embedding Generation", log_to_file=True, buffered=True)
 
-# Get MongoDB collection
-faqs_collection = get_collection("manual", "faqs_regex")
+# Get MongoDB collection. This is an offline bulk ingestion that can simply be re-run,
+# so writes only wait for the primary's acknowledgement instead of a majority
+faqs_collection = get_collection("manual", "faqs_regex").with_options(write_concern=WriteConcern(w=1))
 logger.info(f"Connected to MongoDB collection: faqs_regex")
 
 def generate_embedding(text, embedding_type):
     """Generate embedding based on the specified type
     
     Args:
-        text (str): Text to generate embedding for
+        text (Union[str, List[str]]): Text, or batch of texts, to generate embeddings for
         embedding_type (str): Type of embedding to generate ("hf" or "openai")
         
     Returns:
-        list: Embedding vector
+        np.ndarray: float32 embedding vector, or one row per text when a batch is given
     """
     if embedding_type == "hf":
+        if isinstance(text, list):
+            return generate_hf_embeddings(text)
         return generate_hf_embedding(text)
     elif embedding_type == "openai":
         return generate_openai_embedding(text)
@@ -36,38 +45,123 @@ def generate_embedding(text, embedding_type):
         raise ValueError(f"Unknown embedding type: {embedding_type}")
 
 
-# Find documents that need embeddings
-logger.info("Starting embedding generation process for documents...")
-docs_count = faqs_collection.count_documents({'content':{"$exists": True}})
-logger.info(f"Found {docs_count} documents with 'content' field")
+def iter_batches(cursor, batch_size):
+    """Yield lists of items from an iterable in batches of batch_size
+    
+    Args:
+        cursor (Iterable): Items to group
+        batch_size (int): Maximum number of items per batch
+        
+    Yields:
+        list: Batch of items
+    """
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def content_hash(content):
+    """Hash document content so identical texts can share one embedding
+    
+    Args:
+        content (str): Document content
+        
+    Returns:
+        str: 128-bit blake2b hex digest of the content
+    """
+    return blake2b(content.encode(), digest_size=16).hexdigest()
 
+
+def flush_updates(ops, doc_count):
+    """Write pending embedding updates to MongoDB in one unordered bulk request
     
-# Process each document
+    Args:
+        ops (list): Pending UpdateMany operations
+        doc_count (int): Number of documents targeted by the operations
+        
+    Returns:
+        int: Number of documents matched by the updates (0 if the write failed)
+    """
+    try:
+        result = faqs_collection.bulk_write(ops, ordered=False)
+        if result.modified_count != doc_count:
+            logger.warning(f"{doc_count - result.modified_count} documents in bulk write were not modified")
+        logger.info(f"Successfully updated {result.modified_count} documents with {embedding_type} embedding")
+        return result.matched_count
+    except Exception as e:
+        logger.error(f"Error writing embedding updates for {doc_count} documents: {str(e)}")
+        return 0
+
+
+# Embedding settings
+embedding_type = "openai"  # You can change this to "hf" if needed
+embedding_field = f"content_embedding_{embedding_type}"
+batch_size = int(os.getenv('EMBEDDING_BATCH_SIZE', 256))
+bulk_write_size = int(os.getenv('MONGO_BULK_WRITE_SIZE', 500))
+
+# Find documents that need embeddings: those with content but no embedding yet
+logger.info("Starting embedding generation process for documents...")
+pending_filter = {'content': {"$exists": True}, embedding_field: {"$exists": False}}
+docs_count = faqs_collection.count_documents(pending_filter)
+logger.info(f"Found {docs_count} documents with 'content' field and no '{embedding_field}' field")
+
+
+# Group documents by content hash so that each distinct text is embedded only once
+buckets = defaultdict(list)
+texts = {}
+for doc in faqs_collection.find(pending_filter, projection={"_id": 1, "content": 1}):
+    h = content_hash(doc['content'])
+    buckets[h].append(doc['_id'])
+    texts.setdefault(h, doc['content'])
+logger.info(f"{len(texts)} unique contents among {docs_count} documents")
+
+# Process unique contents in batches: one embedding request per batch, with the
+# resulting updates flushed to MongoDB in bulk writes of up to bulk_write_size documents.
+# Hashes are sorted by content length to group texts of similar length together and
+# minimise padding server-side
 processed_count = 0
 error_count = 0
+ops = []
+pending_docs = 0
 
-for doc in faqs_collection.find({'content':{"$exists": True}}):
+hashes = sorted(texts, key=lambda h: len(texts[h]))
+for batch_number, batch in enumerate(iter_batches(hashes, batch_size)):
     try:
-        doc_id = str(doc['_id'])
-        logger.info(f"Processing document {processed_count+1}/{docs_count}, ID: {doc_id}")
-        
-        # Generate embedding
-        embedding_type = "openai"  # You can change this to "openai" if needed
-        embedding_field = f"content_embedding_{embedding_type}"
-        
-        doc[embedding_field] = generate_embedding(doc['content'], embedding_type)
+        logger.info(f"Embedding batch {batch_number+1} ({len(batch)} unique contents, {len(texts)} total)")
         
-        # Update document in database
-        result = faqs_collection.replace_one({'_id': doc['_id']}, doc)
+        # Generate embeddings for the whole batch in a single request
+        vectors = generate_embedding([texts[h] for h in batch], embedding_type)
         
-        if result.modified_count == 1:
-            logger.info(f"Successfully updated document with {embedding_type} embedding, ID: {doc_id}")
-        else:
-            logger.warning(f"Document was not modified, ID: {doc_id}")
-        
-        processed_count += 1
+        # Queue updates of only the embedding field of every document sharing each content
+        for h, vec in zip(batch, vectors):
+            ops.append(UpdateMany(
+                {"_id": {"$in": buckets[h]}},
+                {"$set": {embedding_field: encode_vector(vec)}}
+            ))
+            pending_docs += len(buckets[h])
     except Exception as e:
-        error_count += 1
-        logger.error(f"Error processing document {str(doc['_id'])}: {str(e)}")
+        error_count += sum(len(buckets[h]) for h in batch)
+        logger.error(f"Error processing batch starting at document {str(buckets[batch[0]][0])}: {str(e)}")
+    
+    if pending_docs >= bulk_write_size:
+        written = flush_updates(ops, pending_docs)
+        processed_count += written
+        error_count += pending_docs - written
+        ops.clear()
+        pending_docs = 0
+
+if ops:
+    written = flush_updates(ops, pending_docs)
+    processed_count += written
+    error_count += pending_docs - written
 
 logger.info(f"Embedding generation complete. Processed {processed_count} documents successfully, {error_count} errors.")
+
+# Cached answers were retrieved with the previous embeddings
+if processed_count:
+    clear_answer_cache()
@@ -0,0 +1,117 @@
+import os
+import sys
+import dotenv
+from pymongo.operations import SearchIndexModel
+
+# Load environment variables
+dotenv.load_dotenv()
+
+# Add the src directory to the Python path to enable imports
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, src_dir)
+
+# Import utilities
+from utils.logger import setup_logger
+from utils.mongo_client import get_collection
+from utils.openai_embeddings import openai_embedding_dimensions
+
+# Set up logger
+logger = setup_logger(name="Vector Index Creation", log_to_file=True)
+
+# Dimensions of the all-MiniLM-L6-v2 embeddings
+HF_EMBEDDING_DIMENSIONS = 384
+
+database = os.getenv('MONGODB_DATABASE', 'manual')
+
+def vector_index(name, path, dimensions, filter_paths=()):
+    """Build an Atlas Vector Search index definition over one embedding field
+    
+    The index stores the vectors scalar-quantized to int8, cutting its memory
+    footprint to about a quarter of the float32 vectors.
+    
+    Args:
+        name (str): Name of the index
+        path (str): Embedding field to index
+        dimensions (int): Number of dimensions of the embeddings
+        filter_paths (Iterable[str]): Fields that $vectorSearch queries can filter on
+    
+    Returns:
+        SearchIndexModel: Index definition for create_search_indexes
+    """
+    return SearchIndexModel(
+        name=name,
+        type="vectorSearch",
+        definition={"fields": [
+            {"type": "vector", "path": path, "numDimensions": dimensions, "similarity": "cosine", "quantization": "scalar"},
+            *({"type": "filter", "path": filter_path} for filter_path in filter_paths)
+        ]}
+    )
+
+# Vector indexes used by $vectorSearch in utils/retriever_client.py and utils/answer_cache.py
+indexes = {
+    os.getenv('MONGODB_COLLECTION_FAQS', 'faqs_regex'): [
+        vector_index(
+            os.getenv('MONGODB_VECTOR_INDEX_OPENAI', 'faqOpenAISemanticSeachRegex'),
+            "content_embedding_openai",
+            openai_embedding_dimensions
+        ),
+        vector_index(
+            os.getenv('MONGODB_VECTOR_INDEX_HF', 'faqSemanticSearch'),
+            "content_embedding_hf",
+            HF_EMBEDDING_DIMENSIONS
+        ),
+    ],
+    os.getenv('MONGODB_COLLECTION_ANSWER_CACHE', 'rag_answer_cache'): [
+        vector_index(
+            os.getenv('MONGODB_VECTOR_INDEX_ANSWER_CACHE', 'answerCacheSemanticSearch'),
+            "query_embedding_openai",
+            openai_embedding_dimensions,
+            filter_paths=["model"]
+        ),
+    ],
+}
+
+def definition_matches(latest, desired):
+    """Check whether an existing index definition has every field setting we need
+    
+    Args:
+        latest (dict): latestDefinition of the existing index
+        desired (dict): Definition the index should have
+    
+    Returns:
+        bool: True if every desired field is present with the same settings
+    """
+    existing_fields = {(field.get("type"), field.get("path")): field for field in latest.get("fields", [])}
+    for field in desired["fields"]:
+        existing = existing_fields.get((field["type"], field["path"]))
+        if existing is None or any(existing.get(key) != value for key, value in field.items()):
+            return False
+    return True
+
+# Create any missing indexes and update any whose definition differs, e.g. after a
+# change of embedding dimensions. Atlas builds them asynchronously
+for collection_name, models in indexes.items():
+    collection = get_collection(database, collection_name)
+    try:
+        # Search indexes can only be created on an existing collection
+        if collection_name not in collection.database.list_collection_names():
+            collection.database.create_collection(collection_name)
+        existing = {index["name"]: index for index in collection.list_search_indexes()}
+        missing = []
+        for model in models:
+            name = model.document["name"]
+            definition = model.document["definition"]
+            if name not in existing:
+                missing.append(model)
+            elif definition_matches(existing[name].get("latestDefinition", {}), definition):
+                logger.info(f"Vector index '{name}' already exists on {collection_name}")
+            else:
+                logger.warning(f"Vector index '{name}' on {collection_name} has an outdated definition, updating it")
+                collection.update_search_index(name, definition)
+        if missing:
+            created = collection.create_search_indexes(missing)
+            logger.info(f"Requested vector indexes {', '.join(created)} on {collection_name}")
+    except Exception as e:
+        logger.error(f"Error creating vector indexes on {collection_name}: {str(e)}")
+
+logger.info("Vector index creation complete!")
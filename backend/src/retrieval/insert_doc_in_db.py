@@ -1,7 +1,11 @@
 import os
-import pandas as pd
 import sys
+import asyncio
 import dotenv
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+from pymongo.errors import BulkWriteError
 
 # Load environment variables
 dotenv.load_dotenv()
@@ -13,8 +17,18 @@ sys.path.insert(0, src_dir)
 # Import the logger and mongo client
 from utils.logger import setup_logger
 from utils.mongo_client import get_collection
-from utils.openai_embeddings import generate_openai_embedding
-from utils.hf_embeddings import generate_hf_embedding
+from utils.openai_embeddings import agenerate_openai_embeddings, openai_embedding_model, openai_embedding_dimensions
+from utils.hf_embeddings import (
+    agenerate_hf_embeddings,
+    generate_hf_embeddings_batch,
+    close_hf_session,
+    hf_embedding_url,
+    HF_EMBEDDING_LOCAL,
+    HF_EMBEDDING_MODEL_ID
+)
+from utils.quantization import encode_vector
+from utils.answer_cache import clear_answer_cache
+from utils.embedding_cache import content_key, open_embedding_cache, load_cached_embeddings, save_embeddings
 
 # Set up logger and paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,7 +39,17 @@ csv_path = os.path.join(
     os.getenv('FAQS_DIR', 'faqs'),
     os.getenv('CSV_FILENAME', 'faqs_regex.csv')
 )
-logger = setup_logger(name="Insert Data to MongoDB", log_to_file=True)
+logger = setup_logger(name="Insert Data to MongoDB", log_to_file=True, buffered=True)
+
+# Number of contents sent per embedding request
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', 128))
+
+# Number of documents sent per insert_many call
+BULK_WRITE_SIZE = int(os.getenv('MONGO_BULK_WRITE_SIZE', 1000))
+
+# Models the cached embeddings were produced by, so a model change invalidates the cache
+OPENAI_CACHE_MODEL = f"openai/{openai_embedding_model}/{openai_embedding_dimensions}"
+HF_CACHE_MODEL = f"local/{HF_EMBEDDING_MODEL_ID}" if HF_EMBEDDING_LOCAL else hf_embedding_url
 
 # Get MongoDB collection
 faqs_collection = get_collection(
@@ -38,44 +62,156 @@ logger.info("Clearing existing data from MongoDB collection...")
 faqs_collection.delete_many({})
 logger.info("Collection cleared successfully")
 
-# Read the CSV file
-df = pd.read_csv(csv_path)
-logger.info(f"CSV loaded with {len(df)} rows and {len(df.columns)} columns")
+# Read the CSV file with Arrow's multithreaded parser. Question and answer are always
+# read as strings, and empty cells become nulls as they would with pandas
+table = pv.read_csv(
+    csv_path,
+    convert_options=pv.ConvertOptions(
+        column_types={'question': pa.string(), 'answer': pa.string()},
+        strings_can_be_null=True
+    )
+)
+logger.info(f"CSV loaded with {table.num_rows} rows and {table.num_columns} columns")
 
 # Data processing
 logger.info("Processing data...")
-# Combine question and answer into a new 'content' column
-df['content'] = "Question: " + df['question'] + "\nAnswer: " + df['answer']
+# Rows without a question or answer have no content to embed
+filtered = table.filter(pc.and_(pc.is_valid(table['question']), pc.is_valid(table['answer'])))
+if filtered.num_rows < table.num_rows:
+    logger.warning(f"Dropped {table.num_rows - filtered.num_rows} rows with a missing question or answer")
+table = filtered
+
+# Combine question and answer into a new 'content' column with Arrow's vectorized
+# string kernel (the last argument is the separator)
+table = table.append_column(
+    'content',
+    pc.binary_join_element_wise("Question: ", table['question'], "\nAnswer: ", table['answer'], "")
+)
 
 # Drop the confidence column if it exists
-if 'confidence' in df.columns:
-    df = df.drop(columns=['confidence'])
+if 'confidence' in table.column_names:
+    table = table.drop_columns(['confidence'])
     logger.info("Dropped 'confidence' column")
 
-logger.info(f"Data processed. Final columns: {', '.join(df.columns)}")
+logger.info(f"Data processed. Final columns: {', '.join(table.column_names)}")
 
-# Convert DataFrame to list of dictionaries (JSON-like)
-records = df.to_dict(orient='records')
+# Convert the table straight to a list of dictionaries (JSON-like) of Python values
+records = table.to_pylist()
 logger.info(f"Converting {len(records)} records to MongoDB documents")
 
-# Generate embeddings for each record
-logger.info("Generating embeddings for documents...")
-for record in records:
-    try:
-        # Generate OpenAI embeddings
-        record['content_embedding_openai'] = generate_openai_embedding(record['content'])
-        logger.debug(f"Generated OpenAI embedding for: {record['question'][:50]}...")
+def set_embeddings(record, embedding_openai, embedding_hf):
+    """Store the OpenAI and HuggingFace embeddings on a record
+    
+    Args:
+        record (dict): Document to update
+        embedding_openai (np.ndarray): OpenAI embedding of the record's content
+        embedding_hf (np.ndarray): HuggingFace embedding of the record's content
+    """
+    record['content_embedding_openai'] = encode_vector(embedding_openai)
+    record['content_embedding_hf'] = encode_vector(embedding_hf)
+
+# Reuse embeddings cached on disk by earlier runs, keyed by content hash, so only new
+# or changed contents are sent to the embedding APIs
+embedding_cache = open_embedding_cache()
+cached_openai = load_cached_embeddings(embedding_cache, OPENAI_CACHE_MODEL)
+cached_hf = load_cached_embeddings(embedding_cache, HF_CACHE_MODEL)
+keys = [content_key(record['content']) for record in records]
+pending = {}
+for key, record in zip(keys, records):
+    if key not in cached_openai or key not in cached_hf:
+        pending.setdefault(key, record['content'])
+logger.info(f"{len(records) - sum(key in pending for key in keys)} records found in the embedding cache, {len(pending)} contents to embed")
+
+def cache_embeddings(batch_keys, embeddings_openai, embeddings_hf):
+    """Add newly generated embeddings to the in-memory and on-disk caches
+    
+    Args:
+        batch_keys (List[str]): Content hashes of the embedded texts
+        embeddings_openai (Iterable[np.ndarray]): OpenAI embeddings, in the same order
+        embeddings_hf (Iterable[np.ndarray]): HuggingFace embeddings, in the same order
+    """
+    embeddings_openai = list(embeddings_openai)
+    embeddings_hf = list(embeddings_hf)
+    cached_openai.update(zip(batch_keys, embeddings_openai))
+    cached_hf.update(zip(batch_keys, embeddings_hf))
+    save_embeddings(embedding_cache, OPENAI_CACHE_MODEL, zip(batch_keys, embeddings_openai))
+    save_embeddings(embedding_cache, HF_CACHE_MODEL, zip(batch_keys, embeddings_hf))
+
+async def aembed_contents(contents):
+    """Embed texts with OpenAI and HuggingFace concurrently
+    
+    The OpenAI request and the HF requests (or, with HF_EMBEDDING_LOCAL, the local
+    forward pass in a worker thread) run at the same time, so a batch takes as long
+    as the slower provider rather than both combined.
+    
+    Args:
+        contents (List[str]): Texts to embed
         
-        # Generate HuggingFace embeddings
-        record['content_embedding_hf'] = generate_hf_embedding(record['content'])
-        logger.debug(f"Generated HF embedding for: {record['question'][:50]}...")
-    except Exception as e:
-        logger.error(f"Error generating embeddings for document: {str(e)}")
+    Returns:
+        tuple: (OpenAI embeddings, HuggingFace embeddings), one row per text
+    """
+    if HF_EMBEDDING_LOCAL:
+        hf_task = asyncio.to_thread(generate_hf_embeddings_batch, contents)
+    else:
+        hf_task = agenerate_hf_embeddings(contents)
+    return await asyncio.gather(agenerate_openai_embeddings(contents), hf_task)
+
+async def aembed_pending():
+    """Embed every pending content in batches of EMBED_BATCH_SIZE, caching the results
+    
+    If a batch fails, its contents are retried one at a time.
+    """
+    pending_keys = list(pending)
+    try:
+        for start in range(0, len(pending_keys), EMBED_BATCH_SIZE):
+            batch_keys = pending_keys[start:start + EMBED_BATCH_SIZE]
+            batch_contents = [pending[key] for key in batch_keys]
+            try:
+                cache_embeddings(batch_keys, *await aembed_contents(batch_contents))
+                logger.debug(f"Generated embeddings for contents {start} to {start + len(batch_keys) - 1}")
+            except Exception as e:
+                logger.error(f"Error generating embeddings for batch starting at content {start}, retrying per content: {str(e)}")
+                for key, content in zip(batch_keys, batch_contents):
+                    try:
+                        cache_embeddings([key], *await aembed_contents([content]))
+                        logger.debug(f"Generated embeddings for: {content[:50]}...")
+                    except Exception as e:
+                        logger.error(f"Error generating embeddings for document: {str(e)}")
+    finally:
+        await close_hf_session()
+
+# Generate embeddings in batches: per EMBED_BATCH_SIZE contents, one OpenAI request
+# runs concurrently with one round of HF requests (or one local forward pass)
+logger.info("Generating embeddings for documents...")
+asyncio.run(aembed_pending())
+embedding_cache.close()
+
+# Attach the embeddings to their records
+for key, record in zip(keys, records):
+    if key in cached_openai and key in cached_hf:
+        set_embeddings(record, cached_openai[key], cached_hf[key])
 
 # Insert the records into MongoDB
 logger.info("Inserting records with embeddings into MongoDB...")
-result = faqs_collection.insert_many(records)
-logger.info(f"Successfully inserted {len(result.inserted_ids)} documents into MongoDB")
+# Unordered inserts let the server apply each chunk without stopping at the first
+# failing document; failed documents are logged and the import continues
+inserted_count = 0
+for start in range(0, len(records), BULK_WRITE_SIZE):
+    try:
+        result = faqs_collection.insert_many(
+            records[start:start + BULK_WRITE_SIZE],
+            ordered=False,
+            bypass_document_validation=True
+        )
+        inserted_count += len(result.inserted_ids)
+    except BulkWriteError as e:
+        inserted_count += e.details.get('nInserted', 0)
+        for error in e.details.get('writeErrors', []):
+            logger.error(f"Error inserting document at index {start + error['index']}: {error['errmsg']}")
+logger.info(f"Successfully inserted {inserted_count} documents into MongoDB")
+
+# Cached answers were generated from the replaced documents
+clear_answer_cache()
 logger.info("Data import complete!")
 
 if __name__ == "__main__":
@@ -23,15 +23,16 @@ logger.info(f"Connected to MongoDB collection: faqs_regex")
 query = "Where is my order?"
 logger.info(f"Searching for: '{query}'")
 
-# Retrieve similar documents using HuggingFace embeddings
+# Retrieve similar documents using OpenAI embeddings
 results = retrieve_similar_documents(query, "openai", 4)
 
-print(f"\nResults for query: '{query}' using HuggingFace embeddings:\n")
+print(f"\nResults for query: '{query}' using OpenAI embeddings:\n")
 for i, document in enumerate(results):
     print(f"Result {i+1}:")
     print(f"Question: {document['question']}")
     print(f"Answer: {document['answer']}")
     print(f"Link: {document['page_url']}")
     print(f"Title: {document['page_title']}")
+    # Atlas reports (1 + cosine) / 2 for a cosine index; show the cosine similarity
+    print(f"Cosine similarity: {2 * document['score'] - 1:.4f}")
     print("")
-
@@ -0,0 +1,122 @@
+"""
+Semantic Answer Cache for RAG System.
+
+This module stores generated answers in a MongoDB collection together with the
+embedding of the question that produced them. Before running the RAG chain, a
+question's embedding is looked up with a `limit: 1` vector search among answers
+generated by the same chat model; if the closest cached question has a cosine
+similarity of at least ANSWER_CACHE_THRESHOLD, its answer and references are reused
+and the LLM call is skipped. Paraphrased questions ("where is my order?" vs "order
+status?") therefore hit the same cached answer.
+
+Cached answers expire after ANSWER_CACHE_TTL_SECONDS through a TTL index on `ts`, and
+are cleared with clear_answer_cache whenever the FAQ documents are re-ingested. The
+collection needs an Atlas vector index on `query_embedding_openai`, with `model` as a
+filter field, named by MONGODB_VECTOR_INDEX_ANSWER_CACHE (see
+retrieval/create_vector_indexes.py). Cache failures are logged and never break answer
+generation.
+"""
+import os
+import dotenv
+import numpy as np
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from utils.logger import setup_logger
+from utils.mongo_client import get_collection
+from utils.quantization import encode_vector
+
+# Load environment variables
+dotenv.load_dotenv()
+
+# Set up logger
+logger = setup_logger(name="Answer Cache", log_to_file=True)
+
+# Cache settings. The threshold is a cosine similarity, not an Atlas vectorSearchScore
+ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', 0.95))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv('ANSWER_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+ANSWER_CACHE_INDEX = os.getenv('MONGODB_VECTOR_INDEX_ANSWER_CACHE', 'answerCacheSemanticSearch')
+
+# Get MongoDB collection holding cached answers
+cache_collection = get_collection(
+    os.getenv('MONGODB_DATABASE', 'manual'),
+    os.getenv('MONGODB_COLLECTION_ANSWER_CACHE', 'rag_answer_cache')
+)
+
+# Expire cached answers so they follow updates to the FAQ content
+try:
+    cache_collection.create_index("ts", expireAfterSeconds=ANSWER_CACHE_TTL_SECONDS)
+except Exception as e:
+    logger.error(f"Error creating TTL index on answer cache: {str(e)}")
+
+def lookup_cached_answer(query_embedding: np.ndarray, model: str) -> Optional[Tuple[str, List[str]]]:
+    """
+    Find a cached answer for a semantically equivalent question.
+
+    Args:
+        query_embedding (np.ndarray): OpenAI embedding of the user's question
+        model (str): Chat model the answer must have been generated with
+
+    Returns:
+        Optional[Tuple[str, List[str]]]: The cached answer and its reference URLs, or
+            None if no cached question reaches ANSWER_CACHE_THRESHOLD
+    """
+    pipeline = [
+        {
+            "$vectorSearch": {
+                "queryVector": np.asarray(query_embedding, dtype=np.float32).tolist(),
+                "path": "query_embedding_openai",
+                "numCandidates": 10,
+                "limit": 1,
+                "index": ANSWER_CACHE_INDEX,
+                "filter": {"model": {"$eq": model}},
+            }
+        },
+        {"$project": {"_id": 0, "query": 1, "answer": 1, "reference_urls": 1, "score": {"$meta": "vectorSearchScore"}}}
+    ]
+    try:
+        hit = next(cache_collection.aggregate(pipeline), None)
+    except Exception as e:
+        logger.error(f"Error looking up answer cache: {str(e)}")
+        return None
+
+    if hit is None:
+        return None
+    # For a cosine index Atlas reports (1 + cosine) / 2, so convert back to a cosine
+    similarity = 2 * hit["score"] - 1
+    if similarity < ANSWER_CACHE_THRESHOLD:
+        return None
+    logger.info(f"Answer cache hit (cosine {similarity:.3f}) on cached question: '{hit['query']}'")
+    return hit["answer"], hit["reference_urls"]
+
+def store_cached_answer(query: str, query_embedding: np.ndarray, model: str, answer: str, reference_urls: List[str]) -> None:
+    """
+    Store a generated answer in the cache.
+
+    Args:
+        query (str): The user's question
+        query_embedding (np.ndarray): OpenAI embedding of the question
+        model (str): Chat model that generated the answer
+        answer (str): The generated answer
+        reference_urls (List[str]): Reference URLs returned with the answer
+    """
+    try:
+        cache_collection.insert_one({
+            "query": query,
+            "query_embedding_openai": encode_vector(query_embedding),
+            "model": model,
+            "answer": answer,
+            "reference_urls": reference_urls,
+            "ts": datetime.now(timezone.utc),
+        })
+    except Exception as e:
+        logger.error(f"Error storing answer in cache: {str(e)}")
+
+def clear_answer_cache() -> None:
+    """
+    Remove every cached answer, e.g. after the FAQ documents have been re-ingested.
+    """
+    try:
+        result = cache_collection.delete_many({})
+        logger.info(f"Cleared {result.deleted_count} cached answers")
+    except Exception as e:
+        logger.error(f"Error clearing answer cache: {str(e)}")
@@ -0,0 +1,85 @@
+"""
+On-disk Embedding Cache.
+
+Embeddings are stored in a SQLite file keyed by the SHA-256 of the embedded text and
+the name of the model that produced them, so re-running ingestion only calls the
+embedding APIs for new or changed content. Vectors are stored as raw float32 bytes.
+"""
+import os
+import sqlite3
+import hashlib
+import numpy as np
+from typing import Dict, Iterable, Tuple
+
+# Location of the cache database, by default in the backend's data directory
+_project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+EMBEDDING_CACHE_PATH = os.getenv(
+    'EMBEDDING_CACHE_PATH',
+    os.path.join(_project_root, os.getenv('DATA_DIR', 'data'), 'embed_cache.db')
+)
+
+
+def content_key(content: str) -> str:
+    """
+    Hash text so it can be looked up in the cache.
+
+    Args:
+        content (str): Embedded text
+
+    Returns:
+        str: SHA-256 hex digest of the text
+    """
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def open_embedding_cache(path: str = EMBEDDING_CACHE_PATH) -> sqlite3.Connection:
+    """
+    Open the cache database, creating it and its table if needed.
+
+    Args:
+        path (str): Path of the SQLite file
+
+    Returns:
+        sqlite3.Connection: Connection to the cache database
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS embeddings ("
+        "hash TEXT NOT NULL, model TEXT NOT NULL, vec BLOB NOT NULL, "
+        "PRIMARY KEY (hash, model))"
+    )
+    return conn
+
+
+def load_cached_embeddings(conn: sqlite3.Connection, model: str) -> Dict[str, np.ndarray]:
+    """
+    Load every cached embedding produced by a model.
+
+    Args:
+        conn (sqlite3.Connection): Cache database connection
+        model (str): Name of the embedding model
+
+    Returns:
+        Dict[str, np.ndarray]: float32 embedding vectors by content hash
+    """
+    rows = conn.execute("SELECT hash, vec FROM embeddings WHERE model = ?", (model,))
+    return {key: np.frombuffer(vec, dtype=np.float32) for key, vec in rows}
+
+
+def save_embeddings(conn: sqlite3.Connection, model: str, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+    """
+    Store embeddings in the cache, replacing any existing entries.
+
+    Args:
+        conn (sqlite3.Connection): Cache database connection
+        model (str): Name of the embedding model
+        items (Iterable[Tuple[str, np.ndarray]]): (content hash, embedding vector) pairs
+    """
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (hash, model, vec) VALUES (?, ?, ?)",
+            ((key, model, np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items)
+        )
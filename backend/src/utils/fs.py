@@ -0,0 +1,22 @@
+"""
+Filesystem Utilities.
+"""
+import os
+
+
+# Directories already created by ensure_dir in this process
+_created_dirs = set()
+
+
+def ensure_dir(path):
+    """
+    Create a directory (and its parents) unless it was already created in this process
+    
+    Args:
+        path (str | Path): Directory to create
+    """
+    path = str(path)
+    if path in _created_dirs:
+        return
+    os.makedirs(path, exist_ok=True)
+    _created_dirs.add(path)
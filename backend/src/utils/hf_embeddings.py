@@ -1,6 +1,9 @@
 import os
-import requests
+import asyncio
+import httpx
+import numpy as np
 import dotenv
+from typing import List
 from utils.logger import setup_logger
 
 # Set up minimal logger
@@ -13,6 +16,29 @@ dotenv.load_dotenv()
 hf_token = os.getenv("HUGGING_FACE_API")
 hf_embedding_url = "https://api-inference.huggingface.co/pipeline/feature-extraction/sentence-transformers/all-MiniLM-L6-v2"
 
+# Local model settings. With HF_EMBEDDING_LOCAL=true, batch embedding runs the same
+# sentence transformer locally (on GPU when available) instead of calling the API
+HF_EMBEDDING_LOCAL = os.getenv("HF_EMBEDDING_LOCAL", "false").lower() == "true"
+HF_EMBEDDING_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+HF_EMBEDDING_MAX_LENGTH = 256
+HF_EMBEDDING_BATCH_SIZE = int(os.getenv("HF_EMBEDDING_BATCH_SIZE", 128))
+
+# Local tokenizer, model and device, loaded on first use
+_local_model = None
+
+# Shared HTTP/2 client: one multiplexed, kept-alive connection for every sync call
+_headers = {"Authorization": f"Bearer {hf_token}"}
+_client = httpx.Client(
+    http2=True,
+    headers=_headers,
+    timeout=60.0,
+    limits=httpx.Limits(max_keepalive_connections=32)
+)
+
+# Async client, created lazily on first async call
+_aclient = None
+_aclient_loop = None
+
 def generate_hf_embedding(text):
     """Generate embedding using Hugging Face API
     
@@ -20,20 +46,161 @@ def generate_hf_embedding(text):
         text (str): Text to generate embedding for
         
     Returns:
-        list: Embedding vector
+        np.ndarray: float32 embedding vector
     """
     try:
-        response = requests.post(
-            hf_embedding_url,
-            headers={"Authorization": f"Bearer {hf_token}"},
-            json={"inputs": text}
-        )
+        response = _client.post(hf_embedding_url, json={"inputs": text})
         
         if response.status_code != 200:
             logger.error(f"Embedding request failed with status code {response.status_code}: {response.text}")
             raise ValueError(f"Request failed with status code {response.status_code}: {response.text}")
             
-        return response.json()
+        return np.asarray(response.json(), dtype=np.float32)
     except Exception as e:
         logger.error(f"Error generating HuggingFace embedding: {str(e)}")
-        raise 
\ No newline at end of file
+        raise 
+
+async def _get_session():
+    """Return the shared async HTTP/2 client, creating it for the running event loop if needed
+    
+    A client left open by a previous event loop is closed before it is replaced.
+    
+    Returns:
+        httpx.AsyncClient: Client bound to the current event loop
+    """
+    global _aclient, _aclient_loop
+    loop = asyncio.get_running_loop()
+    if _aclient is None or _aclient.is_closed or _aclient_loop is not loop:
+        if _aclient is not None and not _aclient.is_closed:
+            # Release the previous loop's connections. Their transports may belong to a
+            # loop that has already been closed, in which case closing them can fail
+            try:
+                await _aclient.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing previous HuggingFace async client: {str(e)}")
+        _aclient = httpx.AsyncClient(
+            http2=True,
+            headers=_headers,
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+        _aclient_loop = loop
+    return _aclient
+
+async def close_hf_session():
+    """Close the shared async client, if one is open"""
+    global _aclient, _aclient_loop
+    if _aclient is not None and not _aclient.is_closed:
+        await _aclient.aclose()
+    _aclient = None
+    _aclient_loop = None
+
+async def agenerate_hf_embeddings(texts: List[str], concurrency: int = 16) -> np.ndarray:
+    """Generate embeddings for many texts concurrently using Hugging Face API
+    
+    Requests are multiplexed over a shared HTTP/2 connection, with at most
+    `concurrency` requests in flight.
+    
+    Args:
+        texts (List[str]): Texts to generate embeddings for
+        concurrency (int): Maximum number of concurrent requests (default: 16)
+        
+    Returns:
+        np.ndarray: float32 matrix of embeddings, one row per text in input order
+    """
+    session = await _get_session()
+    sem = asyncio.Semaphore(concurrency)
+    
+    async def one(text):
+        async with sem:
+            response = await session.post(hf_embedding_url, json={"inputs": text})
+            if response.status_code != 200:
+                logger.error(f"Embedding request failed with status code {response.status_code}: {response.text}")
+                raise ValueError(f"Request failed with status code {response.status_code}: {response.text}")
+            return response.json()
+    
+    try:
+        return np.asarray(await asyncio.gather(*(one(text) for text in texts)), dtype=np.float32)
+    except Exception as e:
+        logger.error(f"Error generating HuggingFace embeddings: {str(e)}")
+        raise
+
+def _load_local_model():
+    """Load the local sentence transformer, moving it to the GPU when one is available
+    
+    Returns:
+        tuple: (tokenizer, model, device)
+    """
+    global _local_model
+    if _local_model is None:
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        tokenizer = AutoTokenizer.from_pretrained(HF_EMBEDDING_MODEL_ID)
+        model = AutoModel.from_pretrained(HF_EMBEDDING_MODEL_ID).to(device).eval()
+        logger.info(f"Loaded local embedding model {HF_EMBEDDING_MODEL_ID} on {device}")
+        _local_model = (tokenizer, model, device)
+    return _local_model
+
+def generate_hf_embeddings_batch(texts: List[str], batch_size: int = HF_EMBEDDING_BATCH_SIZE) -> np.ndarray:
+    """Generate embeddings for many texts with the local sentence transformer
+    
+    Texts are sorted by length so each batched forward pass pads to similar lengths,
+    and run under inference mode, in float16 autocast on GPU. Token embeddings are
+    mean-pooled over non-padding tokens and L2-normalized, as the API does.
+    
+    Args:
+        texts (List[str]): Texts to generate embeddings for
+        batch_size (int): Number of texts per forward pass (default: HF_EMBEDDING_BATCH_SIZE)
+        
+    Returns:
+        np.ndarray: float32 matrix of embeddings, one row per text in input order
+    """
+    import torch
+    
+    tokenizer, model, device = _load_local_model()
+    embeddings = np.empty((len(texts), model.config.hidden_size), dtype=np.float32)
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    try:
+        with torch.inference_mode(), torch.autocast(device_type=device, dtype=torch.float16, enabled=device == "cuda"):
+            for start in range(0, len(texts), batch_size):
+                indices = order[start:start + batch_size]
+                inputs = tokenizer(
+                    [texts[i] for i in indices],
+                    padding=True,
+                    truncation=True,
+                    max_length=HF_EMBEDDING_MAX_LENGTH,
+                    return_tensors="pt"
+                ).to(device)
+                hidden = model(**inputs).last_hidden_state.float()
+                mask = inputs["attention_mask"].unsqueeze(-1).float()
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                embeddings[indices] = torch.nn.functional.normalize(pooled, dim=1).cpu().numpy()
+        return embeddings
+    except Exception as e:
+        logger.error(f"Error generating local HuggingFace embeddings: {str(e)}")
+        raise
+
+def generate_hf_embeddings(texts: List[str], concurrency: int = 16) -> np.ndarray:
+    """Generate embeddings for many texts concurrently from synchronous code
+    
+    Uses the local model via generate_hf_embeddings_batch when HF_EMBEDDING_LOCAL is set.
+    
+    Args:
+        texts (List[str]): Texts to generate embeddings for
+        concurrency (int): Maximum number of concurrent requests (default: 16)
+        
+    Returns:
+        np.ndarray: float32 matrix of embeddings, one row per text in input order
+    """
+    if HF_EMBEDDING_LOCAL:
+        return generate_hf_embeddings_batch(texts)
+    
+    async def run():
+        try:
+            return await agenerate_hf_embeddings(texts, concurrency)
+        finally:
+            await close_hf_session()
+    
+    return asyncio.run(run())
@@ -1,9 +1,10 @@
 import logging
 import os
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import MemoryHandler, RotatingFileHandler
 from datetime import datetime
 from pathlib import Path
+from .fs import ensure_dir
 
 class Logger:
     """
@@ -73,22 +74,34 @@ class Logger:
         return self.logger
 
 
-def setup_logger(name, log_to_file=False, log_level=logging.INFO):
+def setup_logger(name, log_to_file=False, log_level=logging.INFO, buffered=False):
     """
     Set up and return a logger instance
     
+    Calling it again with the same name returns the already configured logger
+    without adding more handlers, so each message is written only once.
+    
     Args:
         name (str): Name of the logger
         log_to_file (bool): Whether to log to a file
         log_level (int): Logging level
-        
+        buffered (bool): Whether to buffer file writes in memory and write them in
+                         batches. Meant for batch scripts; buffered records are lost
+                         if the process is killed, so long-running services should
+                         write each record as it is logged
+    
     Returns:
         logging.Logger: Configured logger instance
     """
-    # Create logger
+    # Reuse the logger if it is already configured
     logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger
     logger.setLevel(log_level)
     
+    # Messages are handled here, so don't also pass them to the root logger's handlers
+    logger.propagate = False
+    
     # Create formatter
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     
@@ -107,13 +120,19 @@ def setup_logger(name, log_to_file=False, log_level=logging.INFO):
             log_dir = Path("backend/logs")
         
         # Create logs directory if it doesn't exist
-        os.makedirs(log_dir, exist_ok=True)
+        ensure_dir(log_dir)
         
-        # Create file handler
+        # Create file handler, opened on the first write
         log_file = log_dir / f"{name}.log"
-        file_handler = logging.FileHandler(log_file)
+        file_handler = logging.FileHandler(log_file, delay=True)
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        if buffered:
+            # Write records in batches, flushing immediately on errors
+            buffered_handler = MemoryHandler(1024, flushLevel=logging.ERROR, target=file_handler)
+            buffered_handler.setLevel(log_level)
+            logger.addHandler(buffered_handler)
+        else:
+            logger.addHandler(file_handler)
     
     return logger 
\ No newline at end of file
@@ -1,7 +1,10 @@
 import pymongo
 import os
+import asyncio
 import dotenv
+import bson
 import certifi
+from motor.motor_asyncio import AsyncIOMotorClient
 from utils.logger import setup_logger
 
 # Set up minimal logger
@@ -13,9 +16,23 @@ dotenv.load_dotenv()
 # MongoDB connection variables
 mongodb_uri = os.getenv("MONGODB_URI")
 
+# Connection pool bounds. Keeping at least one connection open means the first query
+# after startup or an idle period doesn't pay for the TCP and TLS handshakes
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", 100))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", 1))
+
+# BSON encoding of large embedding documents is much slower without the C extension
+if not bson.has_c():
+    logger.warning("bson C extension is not available; falling back to the pure-Python BSON encoder")
+
 # Initialize MongoDB client once
 try:
-    client = pymongo.MongoClient(mongodb_uri, tlsCAFile=certifi.where())
+    client = pymongo.MongoClient(
+        mongodb_uri,
+        tlsCAFile=certifi.where(),
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE
+    )
     # Ping the server to check connection
     client.admin.command('ping')
     logger.info("Successfully connected to MongoDB")
@@ -23,6 +40,10 @@ except Exception as e:
     logger.error(f"Failed to connect to MongoDB: {str(e)}")
     raise
 
+# Async client for use inside event loops, created lazily on first async call
+_async_client = None
+_async_client_loop = None
+
 def get_collection(db_name, collection_name):
     """Get a MongoDB collection from the specified database
     
@@ -39,4 +60,37 @@ def get_collection(db_name, collection_name):
         return collection
     except Exception as e:
         logger.error(f"Error accessing collection {collection_name} in database {db_name}: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+def get_async_collection(db_name, collection_name):
+    """Get a Motor (asyncio) MongoDB collection from the specified database
+    
+    The underlying client is created once per event loop and shared by all callers
+    on that loop. When called from a new loop, the previous loop's client is closed
+    before it is replaced. Must be called from a running event loop.
+    
+    Args:
+        db_name (str): Name of the database
+        collection_name (str): Name of the collection
+        
+    Returns:
+        AsyncIOMotorCollection: Motor collection object
+    """
+    global _async_client, _async_client_loop
+    try:
+        loop = asyncio.get_running_loop()
+        if _async_client is None or _async_client_loop is not loop:
+            # Release the connection pool of the client bound to the previous loop
+            if _async_client is not None:
+                _async_client.close()
+            _async_client = AsyncIOMotorClient(
+                mongodb_uri,
+                tlsCAFile=certifi.where(),
+                maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                minPoolSize=MONGODB_MIN_POOL_SIZE
+            )
+            _async_client_loop = loop
+        return _async_client[db_name][collection_name]
+    except Exception as e:
+        logger.error(f"Error accessing async collection {collection_name} in database {db_name}: {str(e)}")
+        raise
@@ -1,6 +1,8 @@
 import os
 import dotenv
-from openai import OpenAI
+import numpy as np
+from typing import List, Union
+from openai import OpenAI, AsyncOpenAI
 from utils.logger import setup_logger
 
 # Set up minimal logger
@@ -11,29 +13,88 @@ dotenv.load_dotenv()
 
 # OpenAI variables
 openai_api_key = os.getenv("OPENAI_API_KEY")
+openai_embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+openai_embedding_dimensions = int(os.getenv("OPENAI_EMBEDDING_DIMENSIONS", 512))
 
-def generate_openai_embedding(text):
+# Maximum number of inputs the embeddings endpoint accepts per request
+MAX_INPUTS_PER_REQUEST = 2048
+
+# Initialize OpenAI clients once so their HTTP connection pools are reused across calls
+_client = OpenAI(api_key=openai_api_key) if openai_api_key else None
+_aclient = AsyncOpenAI(api_key=openai_api_key) if openai_api_key else None
+
+def generate_openai_embedding(text: Union[str, List[str]]):
     """Generate embedding using OpenAI API
     
+    The embeddings endpoint accepts a list of inputs, so passing a list embeds
+    the whole batch in a single request. Vectors are returned as float32 arrays;
+    encode them with utils.quantization.encode_vector when storing them in MongoDB.
+    
     Args:
-        text (str): Text to generate embedding for
+        text (Union[str, List[str]]): Text, or list of texts, to generate embeddings for
         
     Returns:
-        list: Embedding vector
+        np.ndarray: float32 embedding vector, or a (len(text), dim) matrix of
+                    embeddings (in input order) when a list of texts is given
     """
     try:
-        if not openai_api_key:
+        if _client is None:
             raise ValueError("OPENAI_API_KEY environment variable not set")
             
-        client = OpenAI(api_key=openai_api_key)
-        response = client.embeddings.create(
+        response = _client.embeddings.create(
             input=text,
-            model="text-embedding-ada-002"
+            model=openai_embedding_model,
+            dimensions=openai_embedding_dimensions
         )
         
-        # Extract embedding from response
-        embedding = response.data[0].embedding
-        return embedding
+        # Extract embedding(s) from response
+        if isinstance(text, list):
+            return np.asarray([d.embedding for d in response.data], dtype=np.float32)
+        return np.asarray(response.data[0].embedding, dtype=np.float32)
     except Exception as e:
         logger.error(f"Error generating OpenAI embedding: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+def generate_openai_embeddings_batch(texts: List[str]) -> np.ndarray:
+    """Generate embeddings for many texts in as few requests as possible
+    
+    Texts are sent MAX_INPUTS_PER_REQUEST at a time, so N queries cost
+    ceil(N / 2048) round-trips instead of N.
+    
+    Args:
+        texts (List[str]): Texts to generate embeddings for
+        
+    Returns:
+        np.ndarray: float32 matrix of embeddings, one row per text in input order
+    """
+    if not texts:
+        return np.empty((0, openai_embedding_dimensions), dtype=np.float32)
+    return np.concatenate([
+        generate_openai_embedding(texts[start:start + MAX_INPUTS_PER_REQUEST])
+        for start in range(0, len(texts), MAX_INPUTS_PER_REQUEST)
+    ])
+
+async def agenerate_openai_embeddings(texts: List[str]) -> np.ndarray:
+    """Generate embeddings for a batch of texts using the async OpenAI client
+    
+    All texts are embedded in a single request.
+    
+    Args:
+        texts (List[str]): Texts to generate embeddings for
+        
+    Returns:
+        np.ndarray: float32 matrix of embeddings, one row per text in input order
+    """
+    try:
+        if _aclient is None:
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+            
+        response = await _aclient.embeddings.create(
+            input=texts,
+            model=openai_embedding_model,
+            dimensions=openai_embedding_dimensions
+        )
+        return np.asarray([d.embedding for d in response.data], dtype=np.float32)
+    except Exception as e:
+        logger.error(f"Error generating OpenAI embeddings: {str(e)}")
+        raise
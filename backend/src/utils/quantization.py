@@ -0,0 +1,30 @@
+"""
+Embedding Quantization Utilities.
+
+Embedding vectors are stored as BSON float32 vectors (binary subtype 9), which the
+MongoDB Atlas vector index reads directly. They are built from the raw array bytes
+instead of encoding every component as a separate BSON double, so each stored vector
+takes 4 bytes per dimension. Quantization to int8 for search happens inside the
+vector index itself (scalar quantization, see retrieval/create_vector_indexes.py), so
+no separate quantized copy is stored with the documents.
+"""
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype, VECTOR_SUBTYPE
+
+# Header of a BSON float32 vector: dtype byte followed by the (unused) padding byte
+_FLOAT32_VECTOR_HEADER = BinaryVectorDtype.FLOAT32.value + b"\x00"
+
+
+def encode_vector(vector) -> Binary:
+    """
+    Encode an embedding vector as a BSON float32 vector.
+    
+    Args:
+        vector (list | np.ndarray): Embedding vector to encode
+        
+    Returns:
+        Binary: Vector payload accepted by MongoDB Atlas Vector Search indexes
+    """
+    v = np.asarray(vector, dtype="<f4")
+    return Binary(_FLOAT32_VECTOR_HEADER + v.tobytes(), subtype=VECTOR_SUBTYPE)
+
@@ -4,19 +4,27 @@ Vector Retrieval Client for RAG System.
 This module provides functionality for retrieving relevant documents from a MongoDB
 vector database using semantic search. It supports multiple embedding models:
 
-1. OpenAI embeddings (text-embedding-ada-002)
+1. OpenAI embeddings (text-embedding-3-small, 512 dimensions by default)
 2. HuggingFace embeddings (sentence-transformers)
 
 The module connects to a MongoDB collection containing pre-embedded documents and
 performs vector similarity search to find the most semantically relevant documents
-for a given query.
+for a given query. The vector index must use the same number of dimensions as the
+configured embedding model (see OPENAI_EMBEDDING_DIMENSIONS).
+
+An asyncio variant backed by Motor is provided for callers issuing many queries at
+once, such as the evaluation scripts.
 """
 import os
+import asyncio
 import dotenv
+import numpy as np
+from functools import lru_cache
+from pymongo.errors import OperationFailure
 from utils.logger import setup_logger
-from utils.mongo_client import get_collection
-from utils.hf_embeddings import generate_hf_embedding 
-from utils.openai_embeddings import generate_openai_embedding 
+from utils.mongo_client import get_collection, get_async_collection
+from utils.hf_embeddings import generate_hf_embedding, generate_hf_embeddings
+from utils.openai_embeddings import generate_openai_embedding, generate_openai_embeddings_batch
 
 # Load environment variables
 dotenv.load_dotenv()
@@ -31,7 +39,136 @@ faqs_collection = get_collection(
 )
 logger.info(f"Connected to MongoDB collection: {os.getenv('MONGODB_COLLECTION_FAQS', 'faqs_regex')}")
 
-def retrieve_similar_documents(query: str, embedding_type: str, limit: int) -> list:
+# Candidates examined per requested result; MongoDB recommends 10-20x the limit
+NUM_CANDIDATES_MULTIPLIER = int(os.getenv('MONGODB_VECTOR_CANDIDATES_MULTIPLIER', 15))
+
+# Queries combined into one aggregation by retrieve_similar_documents_batch
+BATCH_QUERIES_PER_REQUEST = 16
+
+# Fields returned for each matching document
+RESULT_PROJECTION = {
+    "_id": 0,
+    "question": 1,
+    "answer": 1,
+    "page_url": 1,
+    "page_title": 1,
+    "content": 1,
+    "score": {"$meta": "vectorSearchScore"},
+}
+
+def _embedding_settings(embedding_type: str) -> tuple:
+    """
+    Look up the embedding field and vector index for an embedding type.
+    
+    Args:
+        embedding_type (str): Type of embedding to use ("hf" or "openai")
+        
+    Returns:
+        tuple: (embedding_field, index_name)
+        
+    Raises:
+        ValueError: If an unsupported embedding type is specified
+    """
+    if embedding_type == "hf":
+        return "content_embedding_hf", os.getenv('MONGODB_VECTOR_INDEX_HF', 'faqSemanticSearch')
+    if embedding_type == "openai":
+        return "content_embedding_openai", os.getenv('MONGODB_VECTOR_INDEX_OPENAI', 'faqOpenAISemanticSeachRegex')
+    logger.error(f"Unsupported embedding type: {embedding_type}")
+    raise ValueError(f"Unsupported embedding type: {embedding_type}")
+
+@lru_cache(maxsize=4096)
+def _embed(query: str, embedding_type: str) -> np.ndarray:
+    """
+    Embed a query, caching the result per (query, embedding_type).
+    
+    Repeated questions (e.g. the same question retrieved for evaluation contexts and
+    again inside the RAG chain) reuse the embedding instead of calling the API again.
+    The cached vector is marked read-only so callers cannot modify it.
+    
+    Args:
+        query (str): The query to embed
+        embedding_type (str): Type of embedding to use ("hf" or "openai")
+        
+    Returns:
+        np.ndarray: Read-only float32 embedding vector
+    """
+    if embedding_type == "hf":
+        embedding = generate_hf_embedding(query)
+    else:
+        embedding = generate_openai_embedding(query)
+    embedding.setflags(write=False)
+    return embedding
+
+def embed_query(query: str, embedding_type: str) -> np.ndarray:
+    """
+    Embed a query with the specified model, reusing cached embeddings.
+    
+    Args:
+        query (str): The query to embed
+        embedding_type (str): Type of embedding to use ("hf" or "openai")
+        
+    Returns:
+        np.ndarray: Read-only float32 embedding vector
+    """
+    _embedding_settings(embedding_type)
+    return _embed(query, embedding_type)
+
+def warm_up(embedding_type: str = "openai") -> None:
+    """
+    Open the connections used by retrieval before the first query arrives.
+    
+    Pings MongoDB and embeds a short text, so the first real query doesn't pay for
+    connection setup to the database and the embedding API. Failures are logged and
+    otherwise ignored.
+    
+    Args:
+        embedding_type (str): Type of embedding to warm up ("hf" or "openai")
+    """
+    try:
+        faqs_collection.database.client.admin.command('ping')
+        if embedding_type == "hf":
+            generate_hf_embedding("warm up")
+        else:
+            generate_openai_embedding("warm up")
+        logger.info(f"Retrieval connections warmed up for {embedding_type} embeddings")
+    except Exception as e:
+        logger.warning(f"Error warming up retrieval connections: {str(e)}")
+
+def _build_pipeline(query_embedding: np.ndarray, embedding_field: str, index_name: str, limit: int, projection: dict = None) -> list:
+    """
+    Construct the MongoDB vector search aggregation pipeline.
+    
+    numCandidates defaults to NUM_CANDIDATES_MULTIPLIER x limit, and can be pinned with
+    MONGODB_VECTOR_NUM_CANDIDATES. Only the fields callers use are projected, so the
+    stored embeddings are not sent back over the wire. The query embedding is kept as
+    a float32 array until here, and converted to a list only for the driver.
+    
+    Args:
+        query_embedding (np.ndarray): Embedding of the query
+        embedding_field (str): Document field holding the embeddings
+        index_name (str): Name of the Atlas vector search index
+        limit (int): Maximum number of documents to return
+        projection (dict, optional): Fields to return, e.g. {"answer": 1}. Defaults
+                                     to RESULT_PROJECTION
+        
+    Returns:
+        list: Aggregation pipeline
+    """
+    num_candidates = int(os.getenv('MONGODB_VECTOR_NUM_CANDIDATES', limit * NUM_CANDIDATES_MULTIPLIER))
+    return [
+        {
+            "$vectorSearch": {
+                "queryVector": np.asarray(query_embedding, dtype=np.float32).tolist(),
+                "path": embedding_field,
+                "numCandidates": num_candidates,
+                "limit": limit,
+                "index": index_name,
+            }
+        },
+        {"$project": {"_id": 0, **projection} if projection else RESULT_PROJECTION}
+    ]
+
+def retrieve_similar_documents(query: str, embedding_type: str, limit: int, query_embedding: np.ndarray = None, projection: dict = None) -> list:
     """
     Retrieve semantically similar documents using vector search.
     
@@ -42,12 +179,18 @@ def retrieve_similar_documents(query: str, embedding_type: str, limit: int) -> l
     
     The function supports two embedding types:
     - "hf": HuggingFace sentence-transformers embeddings
-    - "openai": OpenAI text-embedding-ada-002 embeddings
+    - "openai": OpenAI text-embedding-3-small embeddings
     
     Args:
         query (str): The user's question or search query
         embedding_type (str): Type of embedding to use ("hf" or "openai")
         limit (int): Maximum number of documents to return
+        query_embedding (np.ndarray, optional): Precomputed embedding of the query, from the
+                                          model matching embedding_type. If not
+                                          provided, the query is embedded here
+        projection (dict, optional): Fields to return, e.g. {"answer": 1} for callers
+                                     that only need the answers. Defaults to the
+                                     fields listed below
         
     Returns:
         list: List of document dictionaries containing:
@@ -56,7 +199,7 @@ def retrieve_similar_documents(query: str, embedding_type: str, limit: int) -> l
             - page_url: URL of the source page
             - page_title: Title of the source page
             - content: The full document content
-            - content_embedding_*: The vector embedding (type depends on embedding_type)
+            - score: The vector search similarity score
             
     Raises:
         ValueError: If an unsupported embedding type is specified
@@ -65,44 +208,17 @@ def retrieve_similar_documents(query: str, embedding_type: str, limit: int) -> l
     try:
         logger.info(f"Retrieving documents for query: '{query}' using {embedding_type} embeddings")
         
-        # Generate embedding for query using the specified model
-        if embedding_type == "hf":
-            query_embedding = generate_hf_embedding(query)
-            embedding_field = "content_embedding_hf"
-            index_name = os.getenv('MONGODB_VECTOR_INDEX_HF', 'faqSemanticSearch')
-        elif embedding_type == "openai":
-            query_embedding = generate_openai_embedding(query)
-            embedding_field = "content_embedding_openai"
-            index_name = os.getenv('MONGODB_VECTOR_INDEX_OPENAI', 'faqOpenAISemanticSeachRegex')
-        else:
-            logger.error(f"Unsupported embedding type: {embedding_type}")
-            raise ValueError(f"Unsupported embedding type: {embedding_type}")
-        
-        logger.debug(f"Generated {embedding_type} embedding for query")
+        _embedding_settings(embedding_type)
         
-        # Verify that documents with the correct embedding field exist
-        sample_doc = faqs_collection.find_one({embedding_field: {"$exists": True}})
-        if not sample_doc:
-            logger.error(f"No documents found with {embedding_field} embeddings")
-            return []
-            
-        # Construct MongoDB vector search aggregation pipeline
-        pipeline = [
-            {
-                "$vectorSearch": {
-                    "queryVector": query_embedding,
-                    "path": embedding_field,
-                    "numCandidates": int(os.getenv('MONGODB_VECTOR_NUM_CANDIDATES', 100)),
-                    "limit": limit,
-                    "index": index_name,
-                }
-            }
-        ]
+        # Generate (or reuse the cached) embedding for query using the specified model,
+        # unless already given
+        if query_embedding is None:
+            query_embedding = _embed(query, embedding_type)
         
-        logger.debug(f"Executing vector search with pipeline: {pipeline}")
+        logger.debug("Generated %s embedding for query", embedding_type)
         
-        # Execute the search and collect results
-        results = list(faqs_collection.aggregate(pipeline))
+        # Execute the vector search with the query embedding
+        results = retrieve_with_vector(query_embedding, embedding_type, limit, projection)
         
         if not results:
             logger.warning(f"No results found for query: '{query}'")
@@ -113,4 +229,147 @@ def retrieve_similar_documents(query: str, embedding_type: str, limit: int) -> l
         
     except Exception as e:
         logger.error(f"Error retrieving similar documents: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+def retrieve_with_vector(query_embedding: np.ndarray, embedding_type: str, limit: int, projection: dict = None) -> list:
+    """
+    Retrieve semantically similar documents for an already-computed query embedding.
+    
+    Callers that embed their queries up front (e.g. in one batched request) use this
+    to skip re-embedding.
+    
+    Args:
+        query_embedding (np.ndarray): Embedding of the query, from the model matching embedding_type
+        embedding_type (str): Type of embedding the vector comes from ("hf" or "openai")
+        limit (int): Maximum number of documents to return
+        projection (dict, optional): Fields to return, as for retrieve_similar_documents
+        
+    Returns:
+        list: List of document dictionaries, as returned by retrieve_similar_documents
+        
+    Raises:
+        ValueError: If an unsupported embedding type is specified
+        Exception: For any errors during the retrieval process
+    """
+    try:
+        embedding_field, index_name = _embedding_settings(embedding_type)
+        
+        # Construct MongoDB vector search aggregation pipeline
+        pipeline = _build_pipeline(query_embedding, embedding_field, index_name, limit, projection)
+        
+        logger.debug("Executing vector search index=%s limit=%d", index_name, limit)
+        
+        # Execute the search, fetching all results in a single cursor batch
+        return list(faqs_collection.aggregate(pipeline, batchSize=limit))
+        
+    except Exception as e:
+        logger.error(f"Error retrieving similar documents: {str(e)}")
+        raise
+
+def retrieve_similar_documents_batch(queries: list, embedding_type: str, limit: int, projection: dict = None) -> list:
+    """
+    Retrieve semantically similar documents for many queries at once.
+    
+    All queries are embedded in a single embedding request. The vector searches are
+    then sent BATCH_QUERIES_PER_REQUEST at a time as one aggregation: the first
+    query's $vectorSearch followed by a $unionWith sub-pipeline per remaining query
+    ($vectorSearch must be the first stage of a pipeline, so it cannot run inside
+    $facet). Each result is tagged with its query's position and split back out.
+    If the server rejects $vectorSearch inside $unionWith, the chunk falls back to
+    one aggregation per query.
+    
+    Args:
+        queries (list): Questions or search queries
+        embedding_type (str): Type of embedding to use ("hf" or "openai")
+        limit (int): Maximum number of documents to return per query
+        projection (dict, optional): Fields to return, as for retrieve_similar_documents
+        
+    Returns:
+        list: One list of document dictionaries per query, in input order, each as
+              returned by retrieve_similar_documents
+        
+    Raises:
+        ValueError: If an unsupported embedding type is specified
+        Exception: For any errors during the retrieval process
+    """
+    try:
+        embedding_field, index_name = _embedding_settings(embedding_type)
+        if not queries:
+            return []
+        
+        # Embed every query in one request
+        if embedding_type == "hf":
+            query_embeddings = generate_hf_embeddings(queries)
+        else:
+            query_embeddings = generate_openai_embeddings_batch(list(queries))
+        logger.info(f"Generated {len(query_embeddings)} {embedding_type} query embeddings")
+        
+        def tagged_pipeline(i):
+            pipeline = _build_pipeline(query_embeddings[i], embedding_field, index_name, limit, projection)
+            pipeline[-1]["$project"] = {**pipeline[-1]["$project"], "_query": {"$literal": i}}
+            return pipeline
+        
+        results = [[] for _ in queries]
+        for start in range(0, len(queries), BATCH_QUERIES_PER_REQUEST):
+            chunk = range(start, min(start + BATCH_QUERIES_PER_REQUEST, len(queries)))
+            pipeline = tagged_pipeline(chunk[0]) + [
+                {"$unionWith": {"coll": faqs_collection.name, "pipeline": tagged_pipeline(i)}}
+                for i in chunk[1:]
+            ]
+            try:
+                docs = list(faqs_collection.aggregate(pipeline, batchSize=len(chunk) * limit))
+            except OperationFailure as e:
+                logger.warning(f"Batched vector search failed, querying one by one: {str(e)}")
+                docs = [doc for i in chunk for doc in faqs_collection.aggregate(tagged_pipeline(i), batchSize=limit)]
+            for doc in docs:
+                results[doc.pop("_query")].append(doc)
+        
+        logger.info(f"Retrieved documents for {len(queries)} queries")
+        return results
+        
+    except Exception as e:
+        logger.error(f"Error retrieving similar documents in batch: {str(e)}")
+        raise
+
+async def aretrieve_similar_documents(query: str, embedding_type: str, limit: int, projection: dict = None) -> list:
+    """
+    Retrieve semantically similar documents using vector search, without blocking.
+    
+    Async counterpart of retrieve_similar_documents: the query is embedded in a worker
+    thread and the vector search runs on the event loop, so many queries can be
+    issued together with asyncio.gather.
+    
+    Args:
+        query (str): The user's question or search query
+        embedding_type (str): Type of embedding to use ("hf" or "openai")
+        limit (int): Maximum number of documents to return
+        projection (dict, optional): Fields to return, as for retrieve_similar_documents
+        
+    Returns:
+        list: List of document dictionaries, as returned by retrieve_similar_documents
+        
+    Raises:
+        ValueError: If an unsupported embedding type is specified
+        Exception: For any errors during the retrieval process
+    """
+    try:
+        embedding_field, index_name = _embedding_settings(embedding_type)
+        
+        # Generate (or reuse the cached) embedding for query in a worker thread, so the
+        # embedding cache is shared with the synchronous path
+        query_embedding = await asyncio.to_thread(_embed, query, embedding_type)
+        
+        collection = get_async_collection(
+            os.getenv('MONGODB_DATABASE', 'manual'),
+            os.getenv('MONGODB_COLLECTION_FAQS', 'faqs_regex')
+        )
+        pipeline = _build_pipeline(query_embedding, embedding_field, index_name, limit, projection)
+        results = await collection.aggregate(pipeline, batchSize=limit).to_list(length=limit)
+        
+        if not results:
+            logger.warning(f"No results found for query: '{query}'")
+        return results
+        
+    except Exception as e:
+        logger.error(f"Error retrieving similar documents: {str(e)}")
+        raise